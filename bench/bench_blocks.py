@@ -0,0 +1,37 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from corpus import page  # noqa: E402
+from textnode import (  # noqa: E402
+    block_to_block_type,
+    block_to_html_node,
+    markdown_to_blocks,
+)
+
+
+def timed(fn, blocks):
+    start = time.perf_counter()
+    for block in blocks:
+        fn(block)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block classifier micro-benchmark")
+    parser.add_argument("--blocks", type=int, default=100_000)
+    args = parser.parse_args()
+
+    markdown = page(random.Random(0), "Blocks", blocks=args.blocks, words=12)
+    blocks = markdown_to_blocks(markdown)
+    for name, fn in (("classify", block_to_block_type), ("render", block_to_html_node)):
+        elapsed = min(timed(fn, blocks) for _ in range(3))
+        print(f"{name:<9} {len(blocks)} blocks  {elapsed:6.3f}s  {len(blocks) / elapsed / 1e3:7.1f} k blocks/s")
+
+
+if __name__ == "__main__":
+    main()
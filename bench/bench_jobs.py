@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from corpus import write_corpus  # noqa: E402
+from generator import generate_page_recursive  # noqa: E402
+
+TEMPLATE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "templates", "template.html"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure --jobs scaling")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        write_corpus(content, pages=args.pages)
+        devnull = open(os.devnull, "w")
+        baseline = None
+        for jobs in args.jobs:
+            dest = os.path.join(tmp, f"public{jobs}") + "/"
+            stdout, sys.stdout = sys.stdout, devnull
+            start = time.perf_counter()
+            try:
+                generate_page_recursive(content, TEMPLATE, dest, jobs=jobs)
+            finally:
+                sys.stdout = stdout
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"jobs={jobs:<2} {elapsed:7.3f}s  {args.pages / elapsed:8.1f} pages/s"
+                f"  speedup x{baseline / elapsed:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
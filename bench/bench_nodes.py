@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from htmlnode import LeafNode, ParentNode  # noqa: E402
+from textnode import TextNode, TextTypes  # noqa: E402
+
+COUNT = 200_000
+
+
+def make_text_nodes():
+    return [TextNode("word", TextTypes.text_type_text) for _ in range(COUNT)]
+
+
+def make_leaf_nodes():
+    return [LeafNode("b", "word") for _ in range(COUNT)]
+
+
+def make_parent_nodes():
+    leaf = LeafNode(None, "word")
+    return [ParentNode("p", [leaf]) for _ in range(COUNT)]
+
+
+def measure(factory):
+    tracemalloc.start()
+    nodes = factory()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Discount the list holding the nodes.
+    per_node = (size - sys.getsizeof(nodes)) / COUNT
+    del nodes
+
+    start = time.perf_counter()
+    factory()
+    elapsed = time.perf_counter() - start
+    return per_node, COUNT / elapsed
+
+
+def main():
+    for name, factory in (
+        ("TextNode", make_text_nodes),
+        ("LeafNode", make_leaf_nodes),
+        ("ParentNode", make_parent_nodes),
+    ):
+        per_node, rate = measure(factory)
+        print(f"{name:<11} {per_node:6.1f} bytes/node  {rate / 1e6:5.2f} M nodes/s")
+
+
+if __name__ == "__main__":
+    main()
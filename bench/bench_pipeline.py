@@ -0,0 +1,73 @@
+import argparse
+import builtins
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from corpus import write_corpus  # noqa: E402
+from generator import generate_page_recursive  # noqa: E402
+
+TEMPLATE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "templates", "template.html"
+)
+
+
+def slow_storage(root, latency):
+    # Every open() under root waits `latency` seconds first, like a round
+    # trip to a network mount. sleep() releases the GIL, as real I/O does.
+    real_open = builtins.open
+
+    def open_slowly(file, *args, **kwargs):
+        if isinstance(file, str) and file.startswith(root):
+            time.sleep(latency)
+        return real_open(file, *args, **kwargs)
+
+    builtins.open = open_slowly
+    return real_open
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serial versus --pipeline build time on simulated slow storage"
+    )
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument(
+        "--latency", type=float, nargs="+", default=[0, 0.001, 0.005], help="Seconds per open()"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Keep the best of N runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        write_corpus(content, pages=args.pages)
+        runs = iter(range(1 << 30))
+        for latency in args.latency:
+            real_open = slow_storage(tmp, latency)
+            try:
+                timings = {}
+                for pipeline in (False, True):
+                    best = None
+                    for _ in range(args.repeat):
+                        dest = os.path.join(tmp, f"public{next(runs)}") + "/"
+                        start = time.perf_counter()
+                        errors = generate_page_recursive(
+                            content, TEMPLATE, dest, pipeline=pipeline
+                        )
+                        elapsed = time.perf_counter() - start
+                        if errors:
+                            raise RuntimeError(f"Build failed: {errors[0]}")
+                        best = elapsed if best is None else min(best, elapsed)
+                    timings[pipeline] = best
+            finally:
+                builtins.open = real_open
+            print(
+                f"latency={latency * 1000:5.1f}ms  serial {timings[False]:7.3f}s"
+                f"  pipeline {timings[True]:7.3f}s  speedup x{timings[False] / timings[True]:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
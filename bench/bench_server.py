@@ -0,0 +1,97 @@
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def client(port, paths, deadline, keep_alive, counts, headers):
+    done = 0
+    received = 0
+    conn = http.client.HTTPConnection("localhost", port)
+    while time.monotonic() < deadline:
+        for path in paths:
+            if not keep_alive:
+                conn = http.client.HTTPConnection("localhost", port)
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            received += len(response.read())
+            if not keep_alive or response.will_close:
+                conn.close()
+            done += 1
+    counts.append((done, received))
+
+
+def measure(port, paths, clients, seconds, keep_alive, headers=None):
+    counts = []
+    deadline = time.monotonic() + seconds
+    threads = [
+        threading.Thread(
+            target=client, args=(port, paths, deadline, keep_alive, counts, headers or {})
+        )
+        for _ in range(clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    done = sum(c[0] for c in counts)
+    return done / seconds, sum(c[1] for c in counts) / max(done, 1)
+
+
+def serve(port, directory, extra):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py"), "--dir", directory, "--port", str(port)]
+        + extra,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(50):
+        try:
+            http.client.HTTPConnection("localhost", port, timeout=1).request("HEAD", "/")
+            break
+        except OSError:
+            time.sleep(0.1)
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview server load benchmark")
+    parser.add_argument("--dir", default=os.path.join(ROOT, "public"))
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("paths", nargs="*", default=["/", "/index.css", "/majesty/"])
+    args = parser.parse_args()
+
+    gzip = {"Accept-Encoding": "gzip"}
+    for name, extra, keep_alive, headers in (
+        ("HTTPServer", [], False, gzip),
+        ("threaded", ["--threaded"], True, gzip),
+        ("precompressed", ["--precompressed"], True, gzip),
+    ):
+        proc = serve(args.port, args.dir, extra)
+        try:
+            rate, size = measure(
+                args.port, args.paths, args.clients, args.seconds, keep_alive, headers
+            )
+            print(f"{name:<14} {args.clients} clients  {rate:8.1f} req/s  {size:8.0f} B/req")
+            if extra == ["--threaded"]:
+                etag = http.client.HTTPConnection("localhost", args.port)
+                etag.request("GET", args.paths[0])
+                tag = etag.getresponse().getheader("ETag")
+                rate, size = measure(
+                    args.port, args.paths[:1], args.clients, args.seconds, True,
+                    {"If-None-Match": tag},
+                )
+                print(f"{'  304s':<14} {args.clients} clients  {rate:8.1f} req/s  {size:8.0f} B/req")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+if __name__ == "__main__":
+    main()
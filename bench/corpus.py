@@ -0,0 +1,86 @@
+import argparse
+import os
+import random
+
+WORDS = (
+    "middle earth ring hobbit wizard elf dwarf shire river mountain forest "
+    "king sword journey shadow light tower gate road council fellowship "
+    "ancient silver stone fire night star song tale map lore"
+).split()
+
+
+def sentence(rng, words, link_density, emphasis_density):
+    out = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < link_density:
+            word = f"[{word}](/{rng.choice(WORDS)}/{rng.randrange(1000)})"
+        elif roll < link_density + emphasis_density:
+            word = rng.choice(("**{}**", "*{}*", "`{}`")).format(word)
+        out.append(word)
+    return " ".join(out).capitalize() + "."
+
+
+def page(
+    rng,
+    title,
+    blocks=20,
+    words=40,
+    link_density=0.05,
+    emphasis_density=0.05,
+    list_ratio=0.15,
+    code_ratio=0.05,
+):
+    parts = [f"# {title}"]
+    for i in range(blocks):
+        roll = rng.random()
+        if i % 8 == 7:
+            parts.append(f"## {sentence(rng, 4, 0, 0)}")
+        elif roll < list_ratio:
+            items = [
+                f"- {sentence(rng, words // 4 or 1, link_density, emphasis_density)}"
+                for _ in range(rng.randint(2, 6))
+            ]
+            parts.append("\n".join(items))
+        elif roll < list_ratio + code_ratio:
+            lines = [f"print('{rng.choice(WORDS)}')" for _ in range(rng.randint(2, 8))]
+            parts.append("```\n" + "\n".join(lines) + "\n```")
+        else:
+            parts.append(sentence(rng, words, link_density, emphasis_density))
+    return "\n\n".join(parts) + "\n"
+
+
+def write_corpus(dest, pages=100, seed=0, sections=10, **page_options):
+    rng = random.Random(seed)
+    for n in range(pages):
+        section = os.path.join(dest, f"section{n % sections}")
+        os.makedirs(section, exist_ok=True)
+        with open(os.path.join(section, f"page{n}.md"), "w") as f:
+            f.write(page(rng, f"Page {n}", **page_options))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic markdown corpus")
+    parser.add_argument("dest", type=str, help="Directory to write pages into")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=20, help="Blocks per page")
+    parser.add_argument("--words", type=int, default=40, help="Words per paragraph")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--link-density", type=float, default=0.05)
+    parser.add_argument("--emphasis-density", type=float, default=0.05)
+    parser.add_argument("--list-ratio", type=float, default=0.15)
+    parser.add_argument("--code-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    write_corpus(
+        args.dest,
+        pages=args.pages,
+        seed=args.seed,
+        blocks=args.blocks,
+        words=args.words,
+        link_density=args.link_density,
+        emphasis_density=args.emphasis_density,
+        list_ratio=args.list_ratio,
+        code_ratio=args.code_ratio,
+    )
@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from corpus import page, write_corpus  # noqa: E402
+from generator import generate_page_recursive  # noqa: E402
+from highlight import cache_clear, highlight  # noqa: E402
+from minify import Minifier, minify_stream  # noqa: E402
+from template import load_template  # noqa: E402
+from textnode import (  # noqa: E402
+    BLOCK_RENDERERS,
+    MEMO_SIZE,
+    BlockTypes,
+    configure_memo,
+    iter_blocks,
+    markdown_to_html_node,
+    parse_block,
+    text_to_textnodes,
+)
+
+TEMPLATE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "templates", "template.html"
+)
+PARAGRAPH = BlockTypes.block_type_paragraph.value[0]
+CODE = BlockTypes.block_type_code.value[0]
+
+
+def best_of(repeat, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def split_blocks(pages):
+    for markdown in pages:
+        for _ in iter_blocks(markdown.split("\n")):
+            pass
+
+
+def classify(blocks):
+    for block in blocks:
+        parse_block(block)
+
+
+def inline(texts):
+    for text in texts:
+        text_to_textnodes(text)
+
+
+def render_nodes(parsed):
+    for block_type, payload in parsed:
+        BLOCK_RENDERERS[block_type](payload)
+
+
+def to_html(trees):
+    for tree in trees:
+        tree.to_html()
+
+
+def template_render(template, bodies):
+    for body in bodies:
+        template.render({"Title": "Title", "Content": body})
+
+
+def highlight_blocks(snippets):
+    # Uncached, as on each snippet's first appearance.
+    cache_clear()
+    for snippet in snippets:
+        highlight(snippet, "python")
+
+
+def minify_pages(documents):
+    for document in documents:
+        for _ in minify_stream(document):
+            pass
+
+
+def micro_benchmarks(pages, repeat):
+    # Memos would turn every repeat after the first into cache lookups.
+    configure_memo(0)
+    blocks = [block for markdown in pages for block in iter_blocks(markdown.split("\n"))]
+    parsed = [parse_block(block) for block in blocks]
+    texts = [payload for block_type, payload in parsed if block_type == PARAGRAPH]
+    snippets = [payload for block_type, payload in parsed if block_type == CODE]
+    trees = [markdown_to_html_node(markdown) for markdown in pages]
+    bodies = [tree.to_html() for tree in trees]
+    template = load_template(TEMPLATE)
+    documents = [list(template.stream({"Title": "Title", "Content": body})) for body in bodies]
+    size = sum(len(chunk) for document in documents for chunk in document)
+    return {
+        "split_blocks": (best_of(repeat, split_blocks, pages), len(pages), "pages"),
+        "classify": (best_of(repeat, classify, blocks), len(blocks), "blocks"),
+        "inline": (best_of(repeat, inline, texts), len(texts), "paragraphs"),
+        "render_nodes": (best_of(repeat, render_nodes, parsed), len(parsed), "blocks"),
+        "to_html": (best_of(repeat, to_html, trees), len(trees), "pages"),
+        "template": (best_of(repeat, template_render, template, bodies), len(bodies), "pages"),
+        "minify": (best_of(repeat, minify_pages, documents), size / 1e6, "MB"),
+        "highlight": (best_of(repeat, highlight_blocks, snippets), len(snippets), "blocks"),
+    }
+
+
+def minify_savings(pages):
+    template = load_template(TEMPLATE)
+    minifier = Minifier()
+    for markdown in pages:
+        context = {"Title": "Title", "Content": markdown_to_html_node(markdown).iter_html()}
+        for _ in minify_stream(template.stream(context), minifier):
+            pass
+    return minifier.bytes_in, minifier.bytes_out
+
+
+def build_benchmarks(content, pages, repeat, jobs):
+    # Plain and minified builds take turns, so drift in machine load hits
+    # both alike and the difference is the minify stage.
+    with tempfile.TemporaryDirectory() as tmp:
+        counter = iter(range(2 * repeat))
+
+        def build(minify):
+            dest = os.path.join(tmp, f"public{next(counter)}") + "/"
+            errors = generate_page_recursive(
+                content, TEMPLATE, dest, jobs=jobs, memo=MEMO_SIZE, minify=minify
+            )
+            if errors:
+                raise RuntimeError(f"Build failed: {errors[0]}")
+
+        timings = {False: [], True: []}
+        for _ in range(repeat):
+            for minify in (False, True):
+                timings[minify].append(best_of(1, build, minify))
+        return (
+            (min(timings[False]), pages, "pages"),
+            (min(timings[True]), pages, "pages"),
+        )
+
+
+def run(args):
+    options = {
+        "blocks": args.blocks,
+        "words": args.words,
+        "link_density": args.link_density,
+        "emphasis_density": args.emphasis_density,
+        "list_ratio": args.list_ratio,
+        "code_ratio": args.code_ratio,
+    }
+    rng = random.Random(args.seed)
+    pages = [page(rng, f"Page {n}", **options) for n in range(args.micro_pages)]
+    results = micro_benchmarks(pages, args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        write_corpus(content, pages=args.pages, seed=args.seed, **options)
+        results["build"], results["build_minify"] = build_benchmarks(
+            content, args.pages, args.repeat, args.jobs
+        )
+    bytes_in, bytes_out = minify_savings(pages)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pages": args.pages,
+            "micro_pages": args.micro_pages,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "jobs": args.jobs,
+            "corpus": options,
+            "minify": {"bytes_in": bytes_in, "bytes_out": bytes_out},
+        },
+        "results": {
+            name: {"seconds": seconds, "items": items, "unit": unit}
+            for name, (seconds, items, unit) in results.items()
+        },
+    }
+    for name, (seconds, items, unit) in results.items():
+        if not items or not seconds:
+            print(f"{name:<13} {seconds:8.4f}s  {'no ' + unit:>11}")
+            continue
+        print(f"{name:<13} {seconds:8.4f}s  {items / seconds:11.1f} {unit}/s")
+    saved = bytes_in - bytes_out
+    print(f"minify saved {saved} of {bytes_in} bytes ({saved / bytes_in:.1%})")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"Wrote {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["meta"]["corpus"] != current["meta"]["corpus"]:
+        print("warning: results were measured on different corpora")
+
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<13} {'new':>9}")
+            continue
+        if not (result["items"] and before["items"] and before["seconds"]):
+            # Nothing measured (say, --code-ratio 0 leaves no code blocks).
+            print(f"{name:<13} {'n/a':>9}")
+            continue
+        # Compare per-item times so runs over different page counts still
+        # line up.
+        change = (result["seconds"] / result["items"]) / (
+            before["seconds"] / before["items"]
+        ) - 1
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<13} {change * 100:+8.1f}%{flag}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser, renderer and build benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and optionally save JSON results")
+    run_parser.add_argument("--output", "-o", type=str, default=None)
+    run_parser.add_argument("--pages", type=int, default=500, help="Pages in the build corpus")
+    run_parser.add_argument(
+        "--micro-pages", type=int, default=500, help="Pages for the micro-benchmarks"
+    )
+    run_parser.add_argument("--blocks", type=int, default=20, help="Blocks per page")
+    run_parser.add_argument("--words", type=int, default=40, help="Words per paragraph")
+    run_parser.add_argument("--link-density", type=float, default=0.05)
+    run_parser.add_argument("--emphasis-density", type=float, default=0.05)
+    run_parser.add_argument("--list-ratio", type=float, default=0.15)
+    run_parser.add_argument("--code-ratio", type=float, default=0.05)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--repeat", type=int, default=5, help="Keep the best of N runs")
+    run_parser.add_argument("--jobs", type=int, default=1, help="Worker processes for the build")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser(
+        "compare", help="Compare two result files; exits 1 on regressions"
+    )
+    compare_parser.add_argument("baseline", type=str)
+    compare_parser.add_argument("current", type=str)
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Flag benchmarks more than this fraction slower",
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,183 @@
 import os
+import io
+import sys
 import argparse
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import hashlib
+import posixpath
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# The renderer behind --render lives in src/; it is only imported once a
+# page is rendered, so plain --dir serving doesn't load it.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SCRIPT = (
+    "<script>new EventSource(%r).addEventListener("
+    "'reload', function () { location.reload(); });</script>" % LIVERELOAD_PATH
+)
+
+
+class LiveReload:
+    def __init__(self):
+        self.version = 0
+        self.changed = threading.Condition()
+
+    def notify(self):
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    def wait(self, version, timeout):
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class FileCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def cacheable(self, st):
+        # Don't let one large file evict everything else.
+        return st.st_size <= self.max_bytes // 8
+
+    def get(self, path, st):
+        key = (st.st_mtime_ns, st.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == key:
+                self.entries.move_to_end(path)
+                return entry[1]
+        with open(path, "rb") as f:
+            body = f.read()
+        self.put(path, key, body)
+        return body
+
+    def put(self, path, key, body):
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self.entries[path] = (key, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class PageCache(FileCache):
+    # Renders content/ markdown on request instead of serving a build. A
+    # rendered page is kept until its source, its template (or a partial)
+    # or a page whose title it shows changes; every request re-stats those
+    # files, so edits show up on the next reload without a watcher.
+    def __init__(self, content_dir, template_path, max_bytes=64 * 1024 * 1024):
+        super().__init__(max_bytes)
+        self.content_dir = content_dir
+        self.template_path = template_path
+        # The renderer's memos and link titles are module-level state.
+        self.render_lock = threading.Lock()
+
+    def source_for(self, url_path):
+        # (markdown path, None) for a page URL as the build would name its
+        # output, (None, url) to redirect a directory to its trailing-slash
+        # form, or (None, None). Only absolute paths that stay inside the
+        # content directory are looked up.
+        if not url_path.startswith("/"):
+            return None, None
+        path = posixpath.normpath(unquote(url_path.split("?", 1)[0].split("#", 1)[0]))
+        rel = path.lstrip("/")
+        if url_path.split("?", 1)[0].endswith("/") or not rel:
+            rel = posixpath.join(rel, "index")
+        elif rel.endswith(".html"):
+            rel = rel[: -len(".html")]
+        elif not posixpath.splitext(rel)[1]:
+            index = os.path.join(self.content_dir, rel, "index.md")
+            if self.inside(index) and os.path.isfile(index):
+                return None, path + "/"
+            return None, None
+        source = os.path.join(self.content_dir, rel + ".md")
+        if self.inside(source) and os.path.isfile(source):
+            return source, None
+        return None, None
+
+    def inside(self, path):
+        root = os.path.realpath(self.content_dir)
+        return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+    def get(self, path, st):
+        # (etag, body) for the page rendered from the source at path.
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry is not None:
+            stamp, deps, mtimes, etag = entry[0]
+            if stamp == (st.st_mtime_ns, st.st_size) and mtimes == file_mtimes(deps):
+                with self.lock:
+                    if path in self.entries:
+                        self.entries.move_to_end(path)
+                return etag, entry[1]
+        with self.render_lock:
+            body, deps = self.render(path)
+        mtimes = file_mtimes(deps)
+        # From the content alone, so it holds across restarts.
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.put(path, ((st.st_mtime_ns, st.st_size), deps, mtimes, etag), body)
+        return etag, body
+
+    def render(self, path):
+        # The page as the build would write it, and the other files that
+        # went into it.
+        from generator import TITLE_LINK, page_chunks
+        from metadata import read_metadata, split_front_matter
+        from template import load_template
+        from textnode import configure_links, configure_memo, link_titles, memo_size
+
+        with open(path, "r") as f:
+            markdown = f.read()
+        meta, _ = split_front_matter(markdown.split("\n"))
+        template_path = self.template_path
+        if meta.get("template"):
+            template_path = os.path.join(os.path.dirname(template_path), str(meta["template"]))
+        template = load_template(template_path)
+        deps = list(template.deps)
+        titles = {}
+        for url in TITLE_LINK.findall(markdown):
+            source, _ = self.source_for(url)
+            if source is not None:
+                title = read_metadata(source)["title"]
+                if title:
+                    titles[url] = title
+                deps.append(source)
+        if titles != link_titles():
+            configure_links(titles)
+            # Memoized inline HTML may show the previous titles.
+            configure_memo(memo_size())
+        body = "".join(page_chunks(io.StringIO(markdown), template)).encode()
+        return body, deps
+
+
+def file_mtimes(paths):
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
 
 
 class CORSHTTPRequestHandler(SimpleHTTPRequestHandler):
+    # Set to a LiveReload instance to serve LIVERELOAD_PATH and inject the
+    # reload script into HTML pages.
+    livereload = None
+
     def end_headers(self):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
@@ -12,19 +186,238 @@ class CORSHTTPRequestHandler(SimpleHTTPRequestHandler):
 
     def do_OPTIONS(self):
         self.send_response(200, "OK")
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
+    def do_GET(self):
+        if self.livereload is not None:
+            if self.path == LIVERELOAD_PATH:
+                return self.send_events()
+            page = self.html_page_path()
+            if page is not None:
+                return self.send_page(page)
+        super().do_GET()
+
+    def html_page_path(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                return None
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            return path
+        return None
+
+    def send_page(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        script = LIVERELOAD_SCRIPT.encode()
+        idx = body.rfind(b"</body>")
+        body = body + script if idx == -1 else body[:idx] + script + body[idx:]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        version = self.livereload.version
+        try:
+            while True:
+                latest = self.livereload.wait(version, timeout=15)
+                if latest == version:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    version = latest
+                    self.wfile.write(f"event: reload\ndata: {version}\n\n".encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class CachingHTTPRequestHandler(CORSHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive
+    # responses stall on the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args, cache=None, **kwargs):
+        self.cache = cache if cache is not None else FileCache()
+        super().__init__(*args, **kwargs)
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not self.path.split("?", 1)[0].endswith("/") or not os.path.isfile(index):
+                return super().send_head()
+            path = index
+        try:
+            st = os.stat(path)
+        except OSError:
+            return super().send_head()
+        if path.endswith("/"):
+            return super().send_head()
+
+        content_type = self.guess_type(path)
+        path, st, encoding = self.select_variant(path, st)
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if self.not_modified(etag, st):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+
+        f, length = self.open_body(path, st)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        return f
+
+    def select_variant(self, path, st):
+        return path, st, None
+
+    def open_body(self, path, st):
+        if self.cache.cacheable(st):
+            body = self.cache.get(path, st)
+            return io.BytesIO(body), len(body)
+        f = open(path, "rb")
+        return f, os.fstat(f.fileno()).st_size
+
+    def not_modified(self, etag, st):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(",")]
+            return "*" in tags or etag in tags or f"W/{etag}" in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        # st is None for rendered pages, which only carry an ETag.
+        if if_modified_since is None or st is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        return int(st.st_mtime) <= since.timestamp()
+
+
+class RenderingHTTPRequestHandler(CachingHTTPRequestHandler):
+    # Pages come from a PageCache; anything else (CSS, images) is served
+    # from the directory as usual.
+    def __init__(self, *args, pages=None, **kwargs):
+        self.pages = pages
+        super().__init__(*args, **kwargs)
+
+    def send_head(self):
+        if not self.path.startswith("/"):
+            self.send_error(404, "File not found")
+            return None
+        source, redirect = self.pages.source_for(self.path)
+        if redirect is not None:
+            self.send_response(301)
+            self.send_header("Location", redirect)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        if source is None:
+            return super().send_head()
+        try:
+            st = os.stat(source)
+            etag, body = self.pages.get(source, st)
+        except Exception as e:
+            self.send_error(500, f"Failed to render {source}: {type(e).__name__}: {e}")
+            return None
+        if self.not_modified(etag, None):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("ETag", etag)
+        self.end_headers()
+        return io.BytesIO(body)
+
+
+class PrecompressedHTTPRequestHandler(CachingHTTPRequestHandler):
+    # Content-coding token -> sibling suffix written by the build's
+    # precompress stage, in order of preference.
+    encodings = (("zstd", ".zst"), ("br", ".br"), ("gzip", ".gz"))
+
+    def accepted_encodings(self):
+        accepted = {}
+        for part in self.headers.get("Accept-Encoding", "").split(","):
+            token, _, params = part.strip().partition(";")
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            if token:
+                accepted[token.lower()] = q
+        return accepted
+
+    def select_variant(self, path, st):
+        accepted = self.accepted_encodings()
+        best = None
+        for encoding, suffix in self.encodings:
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if q <= 0 or (best is not None and q <= best[0]):
+                continue
+            try:
+                sibling = os.stat(path + suffix)
+            except OSError:
+                continue
+            # A sibling older than its source is stale; skip it.
+            if sibling.st_mtime_ns >= st.st_mtime_ns:
+                best = (q, path + suffix, sibling, encoding)
+        if best is None:
+            return path, st, None
+        return best[1], best[2], best[3]
+
+    def end_headers(self):
+        self.send_header("Vary", "Accept-Encoding")
+        super().end_headers()
+
+    def open_body(self, path, st):
+        # Real files only: copyfile hands them to os.sendfile.
+        f = open(path, "rb")
+        return f, os.fstat(f.fileno()).st_size
+
+    def copyfile(self, source, outputfile):
+        if not isinstance(source, io.BufferedReader):
+            return super().copyfile(source, outputfile)
+        # socket.sendfile() uses os.sendfile() where available, so the bytes
+        # go from the page cache to the socket without a userspace copy.
+        self.connection.sendfile(source)
+
 
 def run(
     server_class=HTTPServer,
     handler_class=CORSHTTPRequestHandler,
     port=8000,
     directory=None,
+    **handler_kwargs,
 ):
-    if directory:  # Change the current working directory if directory is specified
-        os.chdir(directory)
     server_address = ("", port)
-    httpd = server_class(server_address, handler_class)
+    httpd = server_class(
+        server_address, partial(handler_class, directory=directory, **handler_kwargs)
+    )
     print(
         f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
     httpd.serve_forever()
@@ -37,6 +430,58 @@ if __name__ == "__main__":
     )
     parser.add_argument("--port", type=int,
                         help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--threaded",
+        action="store_true",
+        help="Serve each connection on its own thread with keep-alive and caching",
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=64, help="File cache size in MB (--threaded)"
+    )
+    parser.add_argument(
+        "--precompressed",
+        action="store_true",
+        help="Serve .zst/.br/.gz siblings per Accept-Encoding using sendfile",
+    )
+    parser.add_argument(
+        "--render",
+        type=str,
+        default=None,
+        metavar="CONTENT",
+        help="Render pages from this content directory on request, without a build; "
+        "--dir then only serves the static files",
+    )
+    parser.add_argument(
+        "--template",
+        type=str,
+        help="Page template (--render)",
+        default="templates/template.html",
+    )
     args = parser.parse_args()
 
-    run(port=args.port, directory=args.dir)
+    if args.render:
+        run(
+            server_class=ThreadingHTTPServer,
+            handler_class=RenderingHTTPRequestHandler,
+            port=args.port,
+            directory=args.dir,
+            cache=FileCache(args.cache_size * 1024 * 1024),
+            pages=PageCache(args.render, args.template, args.cache_size * 1024 * 1024),
+        )
+    elif args.precompressed:
+        run(
+            server_class=ThreadingHTTPServer,
+            handler_class=PrecompressedHTTPRequestHandler,
+            port=args.port,
+            directory=args.dir,
+        )
+    elif args.threaded:
+        run(
+            server_class=ThreadingHTTPServer,
+            handler_class=CachingHTTPRequestHandler,
+            port=args.port,
+            directory=args.dir,
+            cache=FileCache(args.cache_size * 1024 * 1024),
+        )
+    else:
+        run(port=args.port, directory=args.dir)
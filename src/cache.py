@@ -0,0 +1,87 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+class RenderCache:
+    # Rendered pages stored under the hash of everything that produced them,
+    # so a clean checkout or another branch with the same sources reuses
+    # them. Entries are written to a temp file and renamed into place, so
+    # parallel workers only ever see whole entries.
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source_path, template_digest, version, data=None):
+        # data: the source's bytes, if they have already been read.
+        h = hashlib.sha256(f"{version}\0{template_digest}\0".encode())
+        if data is not None:
+            h.update(data)
+            return h.hexdigest()
+        with open(source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def fetch(self, key, dest_path):
+        path = self.path_for(key)
+        tmp_path = f"{dest_path}.tmp"
+        try:
+            shutil.copyfile(path, tmp_path)
+        except FileNotFoundError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, dest_path)
+        try:
+            # Mark as recently used for eviction.
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def store(self, key, rendered_path):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        os.close(fd)
+        try:
+            shutil.copyfile(rendered_path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def prune(self):
+        entries = []
+        total = 0
+        for root, _, f_names in os.walk(self.directory):
+            for f in f_names:
+                if f.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, f)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+                total += st.st_size
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,94 @@
+import bz2
+import gzip
+import os
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+CODECS = {
+    "gzip": (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+    "bz2": (".bz2", lambda data: bz2.compress(data, compresslevel=9)),
+}
+if zstd is not None:
+    CODECS["zstd"] = (".zst", lambda data: zstd.compress(data, level=19))
+
+COMPRESSIBLE = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt")
+SUFFIXES = tuple(suffix for suffix, _ in CODECS.values())
+
+
+def unshipped_siblings(directory, static_dir):
+    # Compressed siblings under directory with no counterpart in static_dir:
+    # what an earlier precompress wrote, for outputs that predate its
+    # bookkeeping.
+    siblings = set()
+    for root, _, f_names in os.walk(directory):
+        for f in f_names:
+            if f.endswith(SUFFIXES):
+                rel = os.path.relpath(os.path.join(root, f), directory)
+                if not os.path.exists(os.path.join(static_dir, rel)):
+                    siblings.add(rel)
+    return siblings
+
+
+def precompress(directory, codecs=("gzip",), min_size=1024, generated=None):
+    # generated: siblings (relative to directory) written by earlier runs,
+    # updated in place. Only those are ever replaced or removed, so
+    # compressed files shipped in static/ are left alone.
+    if generated is None:
+        generated = set()
+    unknown = [codec for codec in codecs if codec not in CODECS]
+    if unknown:
+        raise ValueError(f"Unsupported codec(s): {', '.join(unknown)}")
+
+    def remove(path):
+        os.remove(path)
+        generated.discard(os.path.relpath(path, directory))
+
+    # Siblings removed behind our back (say, with the whole output) are
+    # written afresh.
+    generated.difference_update(
+        [rel for rel in generated if not os.path.isfile(os.path.join(directory, rel))]
+    )
+
+    written = 0
+    for root, _, f_names in os.walk(directory):
+        names = set(f_names)
+        for f in f_names:
+            path = os.path.join(root, f)
+            if f.endswith(SUFFIXES):
+                # Drop siblings we generated whose source has been removed.
+                rel = os.path.relpath(path, directory)
+                if rel in generated and os.path.splitext(f)[0] not in names:
+                    remove(path)
+                continue
+            if not f.endswith(COMPRESSIBLE):
+                continue
+            st = os.stat(path)
+            for codec in codecs:
+                suffix, compress = CODECS[codec]
+                target = path + suffix
+                exists = f + suffix in names
+                ours = exists and os.path.relpath(target, directory) in generated
+                if exists and not ours:
+                    continue
+                if st.st_size < min_size:
+                    if ours:
+                        remove(target)
+                    continue
+                if ours and os.stat(target).st_mtime_ns >= st.st_mtime_ns:
+                    continue
+                with open(path, "rb") as src:
+                    data = compress(src.read())
+                if len(data) >= st.st_size:
+                    if ours:
+                        remove(target)
+                    continue
+                tmp = f"{target}.tmp"
+                with open(tmp, "wb") as out:
+                    out.write(data)
+                os.replace(tmp, target)
+                generated.add(os.path.relpath(target, directory))
+                written += 1
+    return written
@@ -1,92 +1,840 @@
+import io
+import json
+import logging
 import os
-from pathlib import Path
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import chain
 
+from highlight import highlight as highlight_code
+from listings import (
+    PER_PAGE,
+    collect_items,
+    listing_digest,
+    listing_to_html_node,
+    plan_listings,
+    url_for,
+)
+from manifest import Manifest
+from metadata import MetadataIndex, split_front_matter, title_from_meta
+from minify import minify_stream
+from pipeline import run_pipeline
+from profiler import Profiler
+from search import SearchIndex, terms_for
+from sitemap import write_sitemap
+from sync import remove_empty_dirs
+from template import load_template
 from textnode import (
-    BlockTypes,
-    block_to_block_type,
-    markdown_to_blocks,
-    markdown_to_html_node,
+    BLOCK_RENDERERS,
+    MEMO_SIZE,
+    block_to_html_node,
+    configure_highlight,
+    configure_images,
+    configure_links,
+    configure_memo,
+    highlighter,
+    image_sizes as get_image_sizes,
+    iter_blocks,
+    iter_blocks_html,
+    link_titles,
+    memo_size,
+    memo_stats,
+    merge_memo_stats,
+    parse_block,
 )
 
+logger = logging.getLogger(__name__)
+
+MAX_CHUNK_SIZE = 64
+# Bump whenever a change alters rendered output, so render cache entries
+# from older versions stop matching.
+GENERATOR_VERSION = "2"
+SEARCH_DIR = "search"
+# [](url): a link that takes its text from the linked page's title.
+TITLE_LINK = re.compile(r"(?<!!)\[\]\(([^)]*)\)")
+IMAGE_REF = re.compile(r"!\[[^\]]*\]\(([^)]*)\)")
+
 
 def extract_title(markdown):
-    blocks = markdown_to_blocks(markdown)
-    if block_to_block_type(blocks[0]) != BlockTypes.block_type_heading.value[0]:
-        raise Exception("Page must have a heading. An h1.")
-    return blocks[0].split("#")[1].strip()
+    meta, lines = split_front_matter(markdown.split("\n"))
+    return title_from_meta(meta, next(iter_blocks(lines), None))
+
+
+def page_chunks(lines, template, text=None, minify=False):
+    meta, lines = split_front_matter(lines)
+    blocks = iter_blocks(lines)
+    first = next(blocks, None)
+    title = title_from_meta(meta, first)
+    content = iter_blocks_html(blocks if first is None else chain([first], blocks), text)
+    chunks = template.stream({"Title": title, "Content": content})
+    return minify_stream(chunks) if minify else chunks
+
+
+def write_page(from_path, template, tmp_path, text=None, minify=False):
+    with open(f"{from_path}", "r") as md, open(tmp_path, "w") as html:
+        html.writelines(page_chunks(md, template, text, minify))
+
+
+def write_page_profiled(from_path, template, tmp_path, profiler, text=None, minify=False):
+    # Same output as write_page, but each stage runs to completion so it
+    # can be timed on its own instead of being interleaved by streaming.
+    with profiler.stage("read", from_path):
+        with open(f"{from_path}", "r") as md:
+            markdown = md.read()
+    with profiler.stage("block split", from_path):
+        meta, lines = split_front_matter(markdown.split("\n"))
+        raw = list(iter_blocks(lines))
+        title = title_from_meta(meta, raw[0] if raw else None)
+        blocks = [parse_block(block) for block in raw]
+    with profiler.stage("inline parse", from_path):
+        nodes = [BLOCK_RENDERERS[block_type](parsed) for block_type, parsed in blocks]
+    if text is not None:
+        with profiler.stage("text extraction", from_path):
+            for node in nodes:
+                text.extend(node.iter_text())
+    with profiler.stage("html serialization", from_path):
+        body = ["<div>"]
+        for node in nodes:
+            body.extend(node.iter_html())
+        body.append("</div>")
+        body = "".join(body)
+    with profiler.stage("template render", from_path):
+        page = template.render({"Title": title, "Content": body})
+    if minify:
+        with profiler.stage("minify", from_path):
+            page = "".join(minify_stream([page]))
+    with profiler.stage("write", from_path):
+        with open(tmp_path, "w") as html:
+            html.write(page)
+
+
+def output_version(minify=False, highlight=False, widths=None):
+    # Part of every cache key and digest for rendered output. widths: from
+    # image_widths().
+    version = GENERATOR_VERSION
+    if minify:
+        version += "+minify"
+    if highlight:
+        version += "+highlight"
+    if widths is not None:
+        version += "+images" + "".join(f",{width}" for width in widths)
+    return version
+
+
+def cache_version(refs=None, minify=False, highlight=False, widths=None):
+    version = output_version(minify, highlight, widths)
+    if refs and any(refs.values()):
+        version += json.dumps(refs, sort_keys=True)
+    return version
+
+
+def image_widths(image_sizes):
+    # None with image sizing off, else the srcset widths; the manifest and
+    # the render cache key record both.
+    return None if image_sizes is None else list(image_sizes.widths)
+
+
+def template_for(md, index, default_template):
+    # Front matter may pick a template next to the default one.
+    meta = index.get(md) if index is not None else None
+    name = meta.get("template") if meta else None
+    if not name:
+        return default_template
+    return os.path.join(os.path.dirname(default_template), str(name))
 
 
-def generate_page(from_path, template_path, dest_path):
-    print(
-        f"""Generating page from {from_path} to {
-            dest_path} using {template_path}..."""
+def template_digest(template_path):
+    try:
+        return load_template(template_path).digest
+    except (OSError, ValueError):
+        # Reported when the page using it is rendered.
+        return None
+
+
+def page_titles(index, pages, dest_dir_path):
+    return {
+        url_for(dest_path, dest_dir_path): index.get(md)["title"]
+        for md, dest_path in pages
+        if index.get(md) is not None and index.get(md)["title"]
+    }
+
+
+def text_of(lines):
+    _, lines = split_front_matter(lines)
+    for block in iter_blocks(lines):
+        yield from block_to_html_node(block).iter_text()
+
+
+def page_text(from_path):
+    # Text of a page served from the render cache, for the search index.
+    with open(from_path, "r") as md:
+        yield from text_of(md)
+
+
+def page_refs(from_path, titles=None, image_sizes=None):
+    with open(from_path, "r") as f:
+        return refs_for(f, titles, image_sizes)
+
+
+def refs_for(lines, titles=None, image_sizes=None):
+    # What the page's output depends on besides its source and template:
+    # the titles its [](url) links show and the sizes of its images.
+    # Scanned a block at a time, as links can't span blocks.
+    refs = {}
+    if titles is not None:
+        refs["links"] = {}
+    if image_sizes is not None:
+        refs["images"] = {}
+    if not refs:
+        return refs
+    for block in iter_blocks(lines):
+        if titles is not None:
+            for url in TITLE_LINK.findall(block):
+                refs["links"][url] = titles.get(url)
+        if image_sizes is not None:
+            for src in IMAGE_REF.findall(block):
+                size = image_sizes.size(src)
+                refs["images"][src] = list(size) if size else None
+    return refs
+
+
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    cache=None,
+    profiler=None,
+    refs=None,
+    text=None,
+    minify=False,
+    highlight=False,
+    widths=None,
+):
+    # refs: from page_refs(), for the render cache key. text: if given, a
+    # list the page's text content is appended to. highlight: whether
+    # configure_highlight() is on, widths: image_widths() of the configured
+    # image sizes, both for the cache key.
+    logger.debug(
+        "Generating page from %s to %s using %s", from_path, dest_path, template_path
     )
 
-    markdown = []
-    template = []
-    with open(f"{from_path}", "r") as md:
-        markdown = md.read()
-
-    with open(f"{template_path}", "r") as tmpl:
-        template = tmpl.readlines()
-
-    nodes = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown)
-    with open(f"{dest_path}", "w+") as html:
-        new_t = ""
-        for t in template:
-            if "{{ Title }}" in t:
-                new_t = t.replace("{{ Title }}", title)
-                html.write(new_t)
+    template = load_template(template_path)
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    if cache is not None:
+        version = cache_version(refs, minify, highlight, widths)
+        key = cache.key(from_path, template.digest, version)
+        with profiler.stage("cache", from_path) if profiler else nullcontext():
+            hit = cache.fetch(key, dest_path)
+        if hit:
+            if text is not None:
+                text.extend(page_text(from_path))
+            return True
+    # Write to a temporary file so a failure mid-page never leaves a
+    # truncated page behind.
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        if profiler is None:
+            write_page(from_path, template, tmp_path, text, minify)
+        else:
+            write_page_profiled(from_path, template, tmp_path, profiler, text, minify)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if cache is not None:
+        cache.store(key, dest_path)
+    return False
+
+
+def dest_for(md, dir_path_content, dest_dir_path):
+    rel = os.path.relpath(md, dir_path_content)
+    return os.path.join(dest_dir_path, os.path.splitext(rel)[0] + ".html")
+
+
+def read_source(page):
+    # Bytes for the cache key and the text as open(..., "r") would give it.
+    with open(page[0], "rb") as f:
+        data = f.read()
+    return data, io.TextIOWrapper(io.BytesIO(data)).read()
+
+
+def write_output(cache, page, output):
+    _, dest_path, _ = page
+    html, key = output
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    if html is None:
+        # Already served from the render cache.
+        return
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(html)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if key is not None:
+        cache.store(key, dest_path)
+
+
+def render_pipelined(
+    chunk,
+    result,
+    cache=None,
+    titles=None,
+    search=False,
+    image_sizes=None,
+    minify=False,
+    highlight=False,
+):
+    # generate_page() for each page, with reading the sources and writing
+    # the outputs moved to I/O threads; see run_pipeline(). Same output.
+    def render(page, source):
+        md, dest_path, template_path = page
+        data, markdown = source
+        refs = refs_for(io.StringIO(markdown), titles, image_sizes)
+        result["refs"][md] = refs
+        text = [] if search else None
+        template = load_template(template_path)
+        key = None
+        if cache is not None:
+            version = cache_version(refs, minify, highlight, image_widths(image_sizes))
+            key = cache.key(md, template.digest, version, data)
+            # Fetched here rather than on the writer thread, so an entry
+            # evicted meanwhile is simply rendered.
+            dest_dir = os.path.dirname(dest_path)
+            if dest_dir:
+                os.makedirs(dest_dir, exist_ok=True)
+            if cache.fetch(key, dest_path):
+                result["hits"] += 1
+                if search:
+                    result["terms"][md] = terms_for(text_of(io.StringIO(markdown)))
+                return None, key
+        html = "".join(page_chunks(io.StringIO(markdown), template, text, minify))
+        if search:
+            result["terms"][md] = terms_for(text)
+        return html, key
+
+    write = partial(write_output, cache)
+    for page, e in run_pipeline(chunk, read_source, render, write):
+        result["errors"].append((page[0], f"{type(e).__name__}: {e}"))
+        result["terms"].pop(page[0], None)
+
+
+def render_chunk(
+    chunk,
+    cache=None,
+    memo=None,
+    profiler=None,
+    titles=None,
+    search=False,
+    image_sizes=None,
+    minify=False,
+    pipeline=False,
+    highlight=False,
+):
+    # Returns plain data so it can come back from a worker process: errors,
+    # cache hits, memo stat deltas, per source its page_refs() and, with
+    # search, its term counts, plus newly probed image sizes. pipeline:
+    # overlap file I/O with rendering; ignored when profiling, whose stage
+    # timings need each page to run start to finish.
+    reset = False
+    if titles is not None and titles != link_titles():
+        configure_links(titles)
+        reset = True
+    if image_sizes is not None:
+        current = get_image_sizes()
+        if current is None or current.config() != image_sizes.config():
+            configure_images(image_sizes)
+            reset = True
+        # Keep the sizes this process already probed.
+        image_sizes = get_image_sizes()
+        image_sizes.probed = {}
+    if highlight != (highlighter() is not None):
+        configure_highlight(highlight_code if highlight else None)
+        reset = True
+    if reset or (memo is not None and memo != memo_size()):
+        configure_memo(memo_size() if memo is None else memo)
+    before = memo_stats()
+    result = {"errors": [], "hits": 0, "refs": {}, "terms": {}}
+    if pipeline and profiler is None:
+        render_pipelined(
+            chunk, result, cache, titles, search, image_sizes, minify, highlight
+        )
+    else:
+        widths = image_widths(image_sizes)
+        for md, dest_path, template_path in chunk:
+            text = [] if search else None
+            try:
+                refs = page_refs(md, titles, image_sizes)
+                result["refs"][md] = refs
+                if profiler is None:
+                    hit = generate_page(
+                        md,
+                        template_path,
+                        dest_path,
+                        cache,
+                        None,
+                        refs,
+                        text,
+                        minify,
+                        highlight,
+                        widths,
+                    )
+                else:
+                    with profiler.page(md):
+                        hit = generate_page(
+                            md,
+                            template_path,
+                            dest_path,
+                            cache,
+                            profiler,
+                            refs,
+                            text,
+                            minify,
+                            highlight,
+                            widths,
+                        )
+                result["hits"] += hit
+            except Exception as e:
+                result["errors"].append((md, f"{type(e).__name__}: {e}"))
                 continue
-            if "{{ Content }}" in t:
-                new_t = t.replace("{{ Content }}", nodes)
-                html.write(new_t)
+            if search:
+                result["terms"][md] = terms_for(text)
+    after = memo_stats()
+    result["memo"] = {
+        name: {k: after[name][k] - before[name][k] for k in after[name]} for name in after
+    }
+    result["probed"] = {} if image_sizes is None else image_sizes.probed
+    return result
+
+
+def render_chunk_profiled(
+    chunk,
+    cache=None,
+    memo=None,
+    titles=None,
+    search=False,
+    image_sizes=None,
+    minify=False,
+    pipeline=False,
+    highlight=False,
+):
+    # Worker-side entry point: profilers don't cross process boundaries,
+    # so record into a fresh one and send back its plain data.
+    profiler = Profiler()
+    result = render_chunk(
+        chunk, cache, memo, profiler, titles, search, image_sizes, minify, pipeline, highlight
+    )
+    result["profile"] = profiler.data()
+    return result
+
+
+def render_pages(
+    pages,
+    jobs=1,
+    cache=None,
+    memo=None,
+    profiler=None,
+    titles=None,
+    search=False,
+    image_sizes=None,
+    minify=False,
+    pipeline=False,
+    highlight=False,
+):
+    # pages: (source, output, template) triples.
+    if jobs <= 1 or len(pages) <= 1:
+        result = render_chunk(
+            pages,
+            cache,
+            memo,
+            profiler,
+            titles,
+            search,
+            image_sizes,
+            minify,
+            pipeline,
+            highlight,
+        )
+    else:
+        # Batch pages so small ones don't pay one IPC round trip each.
+        size = max(1, min(MAX_CHUNK_SIZE, -(-len(pages) // (jobs * 4))))
+        chunks = [pages[i : i + size] for i in range(0, len(pages), size)]
+        result = {"errors": [], "hits": 0, "refs": {}, "terms": {}, "probed": {}}
+        worker = render_chunk if profiler is None else render_chunk_profiled
+        worker = partial(
+            worker,
+            cache=cache,
+            memo=memo,
+            titles=titles,
+            search=search,
+            image_sizes=image_sizes,
+            minify=minify,
+            pipeline=pipeline,
+            highlight=highlight,
+        )
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for chunk_result in pool.map(worker, chunks):
+                result["errors"].extend(chunk_result["errors"])
+                result["hits"] += chunk_result["hits"]
+                result["refs"].update(chunk_result["refs"])
+                result["probed"].update(chunk_result["probed"])
+                result["terms"].update(chunk_result["terms"])
+                merge_memo_stats(chunk_result["memo"])
+                if profiler is not None:
+                    profiler.merge(chunk_result["profile"])
+    if image_sizes is not None:
+        image_sizes.merge(result["probed"])
+    if cache is not None:
+        cache.hits += result["hits"]
+        cache.misses += len(pages) - result["hits"]
+    return result
+
+
+def record_pages(manifest, pages, result, minify=False, highlight=False, widths=None):
+    failed = {md for md, _ in result["errors"]}
+    for md, dest_path, template_path in pages:
+        if md not in failed:
+            template = load_template(template_path)
+            refs = result["refs"].get(md, {})
+            manifest.record(
+                md,
+                dest_path,
+                template_path,
+                template.digest,
+                template.deps,
+                refs.get("links"),
+                refs.get("images"),
+                minify,
+                highlight,
+                widths,
+            )
+
+
+def render_listings(
+    index,
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest=None,
+    drafts=False,
+    per_page=PER_PAGE,
+    minify=False,
+):
+    # Only listing pages whose entries (or template) changed are written;
+    # the digests of the rest are remembered in the manifest.
+    pages = dict(published_pages(index, dir_path_content, dest_dir_path, drafts))
+    items = collect_items(index, pages.items(), dir_path_content, dest_dir_path)
+    template = load_template(template_path)
+    taken = set(pages.values())
+    previous = {} if manifest is None else manifest.listings
+    current = {}
+    written = 0
+    for rel, listing in plan_listings(items, per_page).items():
+        output = os.path.join(dest_dir_path, rel)
+        if output in taken:
+            # A hand-written page wins over a generated listing.
+            continue
+        digest = listing_digest(listing, template.digest, output_version(minify))
+        current[output] = digest
+        if previous.get(output) == digest and os.path.exists(output):
+            continue
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        tmp_path = f"{output}.tmp"
+        with open(tmp_path, "w") as html:
+            chunks = template.stream(
+                {
+                    "Title": listing["title"],
+                    "Content": listing_to_html_node(listing).iter_html(),
+                }
+            )
+            html.writelines(minify_stream(chunks) if minify else chunks)
+        os.replace(tmp_path, output)
+        written += 1
+    for output in previous:
+        if output not in current and os.path.exists(output):
+            os.remove(output)
+            logger.info("Removed stale listing %s", output)
+            remove_empty_dirs(os.path.dirname(output), dest_dir_path)
+    if manifest is not None:
+        manifest.listings = current
+    logger.info("Rendered %d of %d listing pages", written, len(current))
+    return written
+
+
+def update_search(search_path, index, published, terms, dest_dir_path):
+    # published: (source, output) for every page on the site; terms: counts
+    # for the pages rendered this build. Other pages keep their postings.
+    search = SearchIndex(search_path)
+    live = dict(published)
+    touched = set()
+    for source in list(search.ids):
+        if source not in live:
+            touched |= search.remove(source)
+    for source, output in published:
+        url = url_for(output, dest_dir_path)
+        title = index.get(source)["title"]
+        if source in terms:
+            touched |= search.update(source, url, title, terms[source])
+        elif source not in search.ids:
+            # Not rendered this build and never indexed.
+            try:
+                page_terms = terms_for(page_text(source))
+            except Exception:
                 continue
-            html.write(t)
+            touched |= search.update(source, url, title, page_terms)
+        else:
+            touched |= search.retitle(source, url, title)
+    directory = os.path.join(dest_dir_path, SEARCH_DIR)
+    existing = set(os.listdir(directory)) if os.path.isdir(directory) else set()
+    touched |= {
+        name for name in search.shard_names() | {"docs"} if f"{name}.json" not in existing
+    }
+    written = search.write(directory, touched)
+    search.save()
+    logger.info("Search index: %d of %d shards rewritten", written, len(search.shard_names()) + 1)
+
+
+def update_site_indexes(
+    index, published, result, dest_dir_path, search_path=None, site_url=None
+):
+    if search_path is not None:
+        update_search(search_path, index, published, result["terms"], dest_dir_path)
+    if site_url is not None:
+        entries = [
+            (url_for(output, dest_dir_path), index.get(source).get("date"))
+            for source, output in published
+        ]
+        write_sitemap(dest_dir_path, site_url, entries)
+
+
+def finish_images(image_sizes, result, manifest, dest_dir_path):
+    srcs = set()
+    entries = [] if manifest is None else manifest.pages.values()
+    for refs in chain(result["refs"].values(), entries):
+        srcs.update(refs.get("images") or ())
+    written = image_sizes.write_variants(sorted(srcs), dest_dir_path)
+    if written:
+        logger.info("Wrote %d srcset image variants", written)
+    image_sizes.save()
+
+
+def published_pages(index, dir_path_content, dest_dir_path, drafts=False):
+    return [
+        (md, dest_for(md, dir_path_content, dest_dir_path))
+        for md in index.pages
+        if drafts or not index.is_draft(md)
+    ]
 
 
-def generate_page_recursive(dir_path_content, template_path, dest_dir_path):
+def update_pages(
+    sources,
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest,
+    index=None,
+    drafts=False,
+    listings=False,
+    per_page=PER_PAGE,
+    search_path=None,
+    site_url=None,
+    image_sizes=None,
+    minify=False,
+    highlight=False,
+):
+    # Re-render the given sources (or drop the outputs of deleted ones and
+    # of pages that became drafts) without walking the rest of the tree.
+    titles = None
+    if index is not None:
+        index.update(sources)
+        published = published_pages(index, dir_path_content, dest_dir_path, drafts)
+        titles = page_titles(index, published, dest_dir_path)
+    configure_links(titles or {})
+    configure_images(image_sizes)
+    configure_highlight(highlight_code if highlight else None)
+    configure_memo(memo_size())
+    pages = []
+    for md in sources:
+        if os.path.exists(md) and (drafts or index is None or not index.is_draft(md)):
+            dest_path = dest_for(md, dir_path_content, dest_dir_path)
+            pages.append((md, dest_path, template_for(md, index, template_path)))
+            continue
+        output = manifest.forget(md)
+        if output is not None:
+            logger.info("Removed stale page %s", output)
+            remove_empty_dirs(os.path.dirname(output), dest_dir_path)
+    # Pages showing the title of one that just changed, or an image whose
+    # size changed.
+    for md, entry in list(manifest.pages.items()):
+        if md in sources:
+            continue
+        if (titles is not None and not manifest.links_fresh(md, titles)) or (
+            image_sizes is not None and not manifest.images_fresh(md, image_sizes)
+        ):
+            pages.append((md, entry["output"], template_for(md, index, template_path)))
+    result = render_pages(
+        pages,
+        titles=titles,
+        search=search_path is not None,
+        image_sizes=image_sizes,
+        minify=minify,
+        highlight=highlight,
+    )
+    record_pages(manifest, pages, result, minify, highlight, image_widths(image_sizes))
+    if image_sizes is not None:
+        finish_images(image_sizes, result, manifest, dest_dir_path)
+    if index is not None:
+        if listings:
+            render_listings(
+                index,
+                dir_path_content,
+                template_path,
+                dest_dir_path,
+                manifest,
+                drafts,
+                per_page,
+                minify,
+            )
+        update_site_indexes(index, published, result, dest_dir_path, search_path, site_url)
+    return result["errors"]
+
+
+def generate_page_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest_path=None,
+    jobs=1,
+    cache=None,
+    memo=MEMO_SIZE,
+    profiler=None,
+    index_path=None,
+    drafts=False,
+    listings=False,
+    per_page=PER_PAGE,
+    search_path=None,
+    site_url=None,
+    image_sizes=None,
+    minify=False,
+    pipeline=False,
+    highlight=False,
+):
     md_list = []
-    for root, _, f_names in os.walk(dir_path_content):
-        for f in f_names:
-            md_list.append(os.path.join(root, f))
-    for md in md_list:
-        print(
-            f"""Generating page from {md} to {
-                dest_dir_path} using {template_path}..."""
-        )
+    index = MetadataIndex(index_path)
+    with profiler.stage("discovery") if profiler else nullcontext():
+        for root, _, f_names in os.walk(dir_path_content):
+            for f in f_names:
+                md_list.append(os.path.join(root, f))
+        # Only headers are read here; unchanged files keep their entries.
+        index.remove_missing(set(md_list))
+        index.update(md_list)
+    index.save()
+    if not drafts:
+        md_list = [md for md in md_list if not index.is_draft(md)]
+    published = [(md, dest_for(md, dir_path_content, dest_dir_path)) for md in md_list]
+    titles = page_titles(index, published, dest_dir_path)
+    pages = [
+        (md, dest_path, template_for(md, index, template_path)) for md, dest_path in published
+    ]
+    search = search_path is not None
+    configure_links(titles)
+    configure_images(image_sizes)
+    configure_highlight(highlight_code if highlight else None)
+    # Memos live for one build so they never serve output from stale inputs.
+    configure_memo(memo)
 
-        markdown = ""
-        template = []
-        with open(f"{md}", "r") as md:
-            markdown = md.read()
+    if manifest_path is None:
+        result = render_pages(
+            pages,
+            jobs,
+            cache,
+            memo,
+            profiler,
+            titles,
+            search,
+            image_sizes,
+            minify,
+            pipeline,
+            highlight,
+        )
+        if image_sizes is not None:
+            finish_images(image_sizes, result, None, dest_dir_path)
+        if listings:
+            render_listings(
+                index,
+                dir_path_content,
+                template_path,
+                dest_dir_path,
+                None,
+                drafts,
+                per_page,
+                minify,
+            )
+        update_site_indexes(index, published, result, dest_dir_path, search_path, site_url)
+        return result["errors"]
 
-        with open(f"{template_path}", "r") as tmpl:
-            template = tmpl.readlines()
-
-        nodes = markdown_to_html_node(markdown).to_html()
-        title = extract_title(markdown)
-
-        print(f"MD => {md.name.replace('md', 'html')}")
-
-        dest_path = f"""{dest_dir_path}{os.path.dirname(md.name.replace(
-            'content/', ''))}"""
-        if not Path(dest_path).exists():
-            os.makedirs(dest_path)
-        with open(
-            f"""{
-                dest_dir_path}{md.name.replace("content/", "").replace('md', 'html')}""",
-            "w+",
-        ) as html:
-            new_t = ""
-            for t in template:
-                if "{{ Title }}" in t:
-                    new_t = t.replace("{{ Title }}", title)
-                    html.write(new_t)
-                    continue
-                if "{{ Content }}" in t:
-                    new_t = t.replace("{{ Content }}", nodes)
-                    html.write(new_t)
-                    continue
-                html.write(t)
+    manifest = Manifest(manifest_path)
+    for output in manifest.remove_missing(set(md_list)):
+        logger.info("Removed stale page %s", output)
+        remove_empty_dirs(os.path.dirname(output), dest_dir_path)
+    # A page is stale when its source, its template or one of the template's
+    # partials, the title of a page it links to by title, or the size of one
+    # of its images changed, or it was written with other --minify,
+    # --highlight, --image-sizes or --srcset settings.
+    widths = image_widths(image_sizes)
+    pages = [
+        (md, dest_path, template)
+        for md, dest_path, template in pages
+        if not manifest.is_fresh(
+            md,
+            dest_path,
+            template_digest(template),
+            titles,
+            image_sizes,
+            minify,
+            highlight,
+            widths,
+        )
+    ]
+    try:
+        result = render_pages(
+            pages,
+            jobs,
+            cache,
+            memo,
+            profiler,
+            titles,
+            search,
+            image_sizes,
+            minify,
+            pipeline,
+            highlight,
+        )
+        record_pages(manifest, pages, result, minify, highlight, widths)
+        if image_sizes is not None:
+            finish_images(image_sizes, result, manifest, dest_dir_path)
+        if listings:
+            render_listings(
+                index,
+                dir_path_content,
+                template_path,
+                dest_dir_path,
+                manifest,
+                drafts,
+                per_page,
+                minify,
+            )
+        update_site_indexes(index, published, result, dest_dir_path, search_path, site_url)
+    finally:
+        manifest.save()
+    return result["errors"]
@@ -0,0 +1,136 @@
+import re
+from functools import lru_cache
+from html import escape
+
+# Highlighted snippets kept per process; docs repeat the same ones a lot.
+CACHE_SIZE = 1024
+# Token classes, named as Pygments names them so its stylesheets apply.
+COMMENT = "c"
+STRING = "s"
+KEYWORD = "k"
+NUMBER = "m"
+
+C_COMMENT = r"//[^\n]*|/\*[\s\S]*?\*/"
+DOUBLE_QUOTED = r'"(?:[^"\\\n]|\\.)*"'
+SINGLE_QUOTED = r"'(?:[^'\\\n]|\\.)*'"
+NUMBER_LITERAL = r"\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)\b"
+
+
+def lexer(keywords, comment, string):
+    return re.compile(
+        f"(?P<{COMMENT}>{comment})"
+        f"|(?P<{STRING}>{string})"
+        rf"|(?P<{KEYWORD}>\b(?:{'|'.join(keywords.split())})\b)"
+        f"|(?P<{NUMBER}>{NUMBER_LITERAL})"
+    )
+
+
+LEXERS = {
+    "python": lexer(
+        """
+        and as assert async await break class continue def del elif else
+        except False finally for from global if import in is lambda None
+        nonlocal not or pass raise return True try while with yield
+        """,
+        r"#[^\n]*",
+        rf'"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|{DOUBLE_QUOTED}|{SINGLE_QUOTED}',
+    ),
+    "javascript": lexer(
+        """
+        async await break case catch class const continue default delete do
+        else export extends false finally for function if import in
+        instanceof let new null of return super switch this throw true try
+        typeof undefined var void while yield interface type enum
+        """,
+        C_COMMENT,
+        rf"`(?:[^`\\]|\\.)*`|{DOUBLE_QUOTED}|{SINGLE_QUOTED}",
+    ),
+    "go": lexer(
+        """
+        break case chan const continue default defer else fallthrough false
+        for func go goto if import interface map nil package range return
+        select struct switch true type var
+        """,
+        C_COMMENT,
+        rf"`[^`]*`|{DOUBLE_QUOTED}|{SINGLE_QUOTED}",
+    ),
+    "rust": lexer(
+        """
+        as async await break const continue crate else enum extern false fn
+        for if impl in let loop match mod move mut pub ref return self Self
+        static struct super trait true type unsafe use where while
+        """,
+        C_COMMENT,
+        # Single quotes are left alone: they are also lifetimes.
+        DOUBLE_QUOTED,
+    ),
+    "c": lexer(
+        """
+        auto break case char class const continue default delete do double
+        else enum extern false float for goto if inline int long namespace
+        new nullptr private protected public return short signed sizeof
+        static struct switch template this true typedef union unsigned void
+        volatile while
+        """,
+        C_COMMENT,
+        rf"{DOUBLE_QUOTED}|{SINGLE_QUOTED}",
+    ),
+    "bash": lexer(
+        """
+        case do done elif else esac export fi for function if in local
+        return then until while
+        """,
+        r"(?<![^\s;|&(])#[^\n]*",
+        rf"{DOUBLE_QUOTED}|'[^']*'",
+    ),
+    "json": lexer("true false null", r"(?!)", DOUBLE_QUOTED),
+}
+ALIASES = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "jsx": "javascript",
+    "ts": "javascript",
+    "tsx": "javascript",
+    "typescript": "javascript",
+    "golang": "go",
+    "rs": "rust",
+    "h": "c",
+    "cpp": "c",
+    "c++": "c",
+    "sh": "bash",
+    "shell": "bash",
+    "zsh": "bash",
+}
+
+
+def highlight(code, language):
+    # (class, escaped text) runs for code in a known language, class None
+    # for plain text; None for other languages.
+    language = language.lower()
+    language = ALIASES.get(language, language)
+    if language not in LEXERS:
+        return None
+    return _highlight(code, language)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _highlight(code, language):
+    runs = []
+    pos = 0
+    for match in LEXERS[language].finditer(code):
+        if match.start() > pos:
+            runs.append((None, escape(code[pos : match.start()], quote=False)))
+        runs.append((match.lastgroup, escape(match.group(), quote=False)))
+        pos = match.end()
+    if pos < len(code):
+        runs.append((None, escape(code[pos:], quote=False)))
+    return tuple(runs)
+
+
+def cache_info():
+    return _highlight.cache_info()
+
+
+def cache_clear():
+    _highlight.cache_clear()
@@ -2,6 +2,8 @@ from typing import Optional
 
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: Optional[str] = None,
@@ -17,21 +19,52 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError()
 
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_to(self, fp):
+        fp.writelines(self.iter_html())
+
+    def iter_text(self):
+        # Text content of the leaves, in document order.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.children is not None:
+                stack.extend(reversed(node.children))
+            elif node.value:
+                yield node.value
+
     def props_to_html(self):
         if self.props is None:
             return ""
-        html_attr = ""
-        for prop in self.props:
-            html_attr += f' {prop}="{self.props[prop]}"'
-        return html_attr
+        return "".join(f' {prop}="{value}"' for prop, value in self.props.items())
+
+    def _key(self):
+        children = None if self.children is None else tuple(self.children)
+        props = None if self.props is None else frozenset(self.props.items())
+        return (type(self), self.tag, self.value, children, props)
+
+    def __eq__(self, other):
+        if not isinstance(other, HTMLNode):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
 
     def __repr__(self):
-        return f"Tag: {self.tag} Value: {self.value} Children: {self.children} Props: {self.fprops}"
+        return f"Tag: {self.tag} Value: {self.value} Children: {self.children} Props: {self.props}"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, value: str, props=None):
-        super().__init__(tag, value, None, props)
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
 
     def to_html(self):
         if self.value is None:
@@ -47,20 +80,38 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children, props=None):
-        super().__init__(tag, None, children, props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
 
     def to_html(self):
-        if self.tag is None:
-            raise ValueError("Tag should be provided")
-
-        if self.children is None:
-            raise ValueError("Children has to be provided")
-
-        children_html = ""
-        for c in self.children:
-            children_html += c.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        # Walk the subtree with an explicit stack so each tag is emitted once
+        # instead of being copied into every ancestor's string.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+                continue
+            if not isinstance(node, ParentNode):
+                yield from node.iter_html()
+                continue
+            if node.tag is None:
+                raise ValueError("Tag should be provided")
+
+            if node.children is None:
+                raise ValueError("Children has to be provided")
+
+            yield f"<{node.tag}{node.props_to_html()}>"
+            stack.append(f"</{node.tag}>")
+            stack.extend(reversed(node.children))
 
     def __repr__(self):
         return f"ParentNode({self.tag} {self.children} {self.props})"
@@ -0,0 +1,204 @@
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGES_VERSION = 1
+HEADER_SIZE = 64
+# JPEG start-of-frame markers; C4, C8 and CC share the range but are not frames.
+JPEG_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def probe_png(head, f):
+    if head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    return None
+
+
+def probe_gif(head, f):
+    return struct.unpack("<HH", head[6:10])
+
+
+def probe_webp(head, f):
+    if head[8:12] != b"WEBP":
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a" and len(head) >= 30:
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20:21] == b"\x2f" and len(head) >= 25:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(head) >= 30:
+        width = int.from_bytes(head[24:27], "little") + 1
+        return width, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def probe_jpeg(head, f):
+    # Walk the marker segments up to the first frame header.
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        while marker[1] == 0xFF:
+            marker = marker[:1] + f.read(1)
+            if len(marker) < 2:
+                return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        size = struct.unpack(">H", length)[0]
+        if marker[1] in JPEG_SOF:
+            segment = f.read(5)
+            if len(segment) < 5:
+                return None
+            height, width = struct.unpack(">HH", segment[1:5])
+            return width, height
+        f.seek(size - 2, os.SEEK_CUR)
+
+
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", probe_png),
+    (b"GIF87a", probe_gif),
+    (b"GIF89a", probe_gif),
+    (b"\xff\xd8", probe_jpeg),
+    (b"RIFF", probe_webp),
+)
+
+
+def probe(path):
+    # Width and height from the file header alone, or None.
+    with open(path, "rb") as f:
+        head = f.read(HEADER_SIZE)
+        for signature, probe_format in SIGNATURES:
+            if head.startswith(signature):
+                try:
+                    return probe_format(head, f)
+                except (struct.error, IndexError):
+                    # Truncated or corrupt.
+                    return None
+    return None
+
+
+def variant_path(path, width):
+    base, ext = os.path.splitext(path)
+    return f"{base}-{width}w{ext}"
+
+
+def make_variant(source, target, width):
+    st = os.stat(source)
+    if os.path.exists(target) and os.stat(target).st_mtime_ns >= st.st_mtime_ns:
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with Image.open(source) as image:
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        tmp = f"{target}.tmp{os.path.splitext(target)[1]}"
+        resized.save(tmp)
+    os.replace(tmp, target)
+    return True
+
+
+class ImageSizes:
+    # Resolves <img> sources under the static directory to their extra
+    # attributes. Probed sizes are kept by path, mtime and size in a JSON
+    # file, so unchanged images are only stat'ed on later builds. Picklable,
+    # so worker processes can carry a copy; see merge().
+    def __init__(self, static_dir, path=None, widths=()):
+        self.static_dir = static_dir
+        self.path = path
+        self.widths = tuple(sorted(widths)) if Image is not None else ()
+        self.entries = {}
+        self.probed = {}
+        self.load()
+
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        if data.get("version") == IMAGES_VERSION:
+            self.entries = data.get("images", {})
+
+    def save(self):
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": IMAGES_VERSION, "images": self.entries}, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def file_for(self, src):
+        if "://" in src or not src.startswith("/"):
+            return None
+        return os.path.join(self.static_dir, src.lstrip("/"))
+
+    def size(self, src):
+        path = self.file_for(src)
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        entry = self.entries.get(path)
+        if entry is None or entry[:2] != [st.st_mtime_ns, st.st_size]:
+            try:
+                dimensions = probe(path)
+            except OSError:
+                dimensions = None
+            entry = [st.st_mtime_ns, st.st_size] + (list(dimensions) if dimensions else [])
+            self.entries[path] = entry
+            self.probed[path] = entry
+        return tuple(entry[2:]) or None
+
+    def attrs(self, src):
+        props = {}
+        size = self.size(src)
+        if size is not None:
+            props["width"] = str(size[0])
+            props["height"] = str(size[1])
+            widths = [w for w in self.widths if w < size[0]]
+            if widths:
+                props["srcset"] = ", ".join(
+                    [f"{variant_path(src, w)} {w}w" for w in widths] + [f"{src} {size[0]}w"]
+                )
+        props["loading"] = "lazy"
+        props["decoding"] = "async"
+        return props
+
+    def config(self):
+        return (self.static_dir, self.widths)
+
+    def merge(self, probed):
+        # Fold in sizes probed by worker processes.
+        self.entries.update(probed)
+
+    def write_variants(self, srcs, dest_dir_path, workers=8):
+        # Downscaled copies for srcset, next to the image in the output;
+        # existing ones newer than their source are left alone.
+        jobs = []
+        for src in srcs:
+            size = self.size(src)
+            if size is None:
+                continue
+            for width in self.widths:
+                if width < size[0]:
+                    target = os.path.join(dest_dir_path, variant_path(src, width).lstrip("/"))
+                    jobs.append((self.file_for(src), target, width))
+        if not jobs:
+            return 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(lambda job: make_variant(*job), jobs))
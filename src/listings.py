@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import re
+
+from htmlnode import LeafNode, ParentNode
+
+PER_PAGE = 10
+SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(text):
+    return SLUG.sub("-", text.lower()).strip("-") or "untitled"
+
+
+def url_for(output, dest_dir_path):
+    rel = os.path.relpath(output, dest_dir_path).replace(os.sep, "/")
+    if rel == "index.html":
+        return "/"
+    if rel.endswith("/index.html"):
+        return "/" + rel[: -len("index.html")]
+    return "/" + rel
+
+
+def collect_items(index, pages, dir_path_content, dest_dir_path):
+    # pages: (source, output) pairs of everything published this build.
+    items = []
+    for md, output in pages:
+        meta = index.get(md)
+        if meta is None or not meta["title"]:
+            continue
+        items.append(
+            {
+                "title": meta["title"],
+                "url": url_for(output, dest_dir_path),
+                "date": meta.get("date", ""),
+                "tags": meta["tags"],
+                "section": os.path.dirname(os.path.relpath(md, dir_path_content)),
+                "index": os.path.basename(output) == "index.html",
+            }
+        )
+    # Newest first; undated pages sort last, by title.
+    items.sort(key=lambda item: item["title"])
+    items.sort(key=lambda item: item["date"], reverse=True)
+    return items
+
+
+def paginate(listings, base, title, entries, per_page):
+    def rel(n):
+        return f"{base}index.html" if n == 1 else f"{base}page/{n}/index.html"
+
+    chunks = [entries[i : i + per_page] for i in range(0, len(entries), per_page)]
+    for n, chunk in enumerate(chunks, 1):
+        listings[rel(n)] = {
+            "title": title if n == 1 else f"{title} (page {n})",
+            "entries": chunk,
+            "prev": "/" + rel(n - 1)[: -len("index.html")] if n > 1 else None,
+            "next": "/" + rel(n + 1)[: -len("index.html")] if n < len(chunks) else None,
+        }
+
+
+def plan_listings(items, per_page=PER_PAGE):
+    # Map output paths (relative to the destination root) to what each
+    # listing page shows, so unchanged pages can be recognised by hash.
+    def entry(item):
+        return [item["title"], item["url"], item["date"]]
+
+    listings = {}
+    paginate(listings, "archive/", "Archive", [entry(i) for i in items], per_page)
+
+    sections = {}
+    tags = {}
+    for item in items:
+        if item["section"] and not item["index"]:
+            sections.setdefault(item["section"], []).append(entry(item))
+        for tag in item["tags"]:
+            tags.setdefault(tag, []).append(entry(item))
+    for section, entries in sections.items():
+        base = section.replace(os.sep, "/") + "/"
+        paginate(listings, base, section.replace(os.sep, "/"), entries, per_page)
+
+    tag_entries = []
+    slugs = set()
+    for tag in sorted(tags):
+        # Tags that slugify alike ("C" and "C++") get numbered suffixes, in
+        # sorted order so each keeps its URL from build to build.
+        slug = base_slug = slugify(tag)
+        n = 1
+        while slug in slugs:
+            n += 1
+            slug = f"{base_slug}-{n}"
+        slugs.add(slug)
+        base = f"tags/{slug}/"
+        paginate(listings, base, f"Tagged {tag}", tags[tag], per_page)
+        tag_entries.append([f"{tag} ({len(tags[tag])})", "/" + base, ""])
+    if tag_entries:
+        paginate(listings, "tags/", "Tags", tag_entries, len(tag_entries))
+    return listings
+
+
+def listing_digest(listing, template_digest, version):
+    data = json.dumps(listing, sort_keys=True).encode()
+    return hashlib.sha256(data + template_digest.encode() + version.encode()).hexdigest()
+
+
+def listing_to_html_node(listing):
+    children = [LeafNode("h1", listing["title"])]
+    if listing["entries"]:
+        rows = []
+        for title, url, date in listing["entries"]:
+            row = [LeafNode("a", title, {"href": url})]
+            if date:
+                row.append(LeafNode("time", date))
+            rows.append(ParentNode("li", row))
+        children.append(ParentNode("ul", rows))
+    links = [
+        LeafNode("a", label, {"href": listing[rel], "rel": rel})
+        for rel, label in (("prev", "Newer"), ("next", "Older"))
+        if listing[rel]
+    ]
+    if links:
+        children.append(ParentNode("nav", links))
+    return ParentNode("div", children)
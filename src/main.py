@@ -1,19 +1,301 @@
+import argparse
+import json
+import logging
+import logging.handlers
+import os
+import sys
 from shutil import copytree, rmtree
 
+from cache import RenderCache
+from compress import CODECS, precompress, unshipped_siblings
 from generator import generate_page_recursive
+from images import Image, ImageSizes
+from listings import PER_PAGE
+from manifest import Manifest
+from profiler import Profiler
+from sync import sync_tree
+from textnode import MEMO_SIZE, memo_stats
 
+MANIFEST_PATH = ".build/manifest.json"
+METADATA_PATH = ".build/metadata.json"
+SEARCH_PATH = ".build/search.json"
+IMAGES_PATH = ".build/images.json"
+PROFILE_PATH = ".build/profile.json"
+TRACE_PATH = ".build/trace.json"
 
-def static_to_public():
-    try:
+logger = logging.getLogger(__name__)
+
+
+def configure_logging(verbosity, default=logging.WARNING, buffered=True):
+    level = max(logging.DEBUG, default - 10 * verbosity)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    if buffered:
+        # Write records out in batches instead of one write per page; errors
+        # flush straight away.
+        handler = logging.handlers.MemoryHandler(
+            1024, flushLevel=logging.ERROR, target=handler
+        )
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+
+def static_to_public(incremental=False, use_hash=False, link=False):
+    if incremental:
+        manifest = Manifest(MANIFEST_PATH)
+        copied, removed = sync_tree(
+            "static", "public", manifest.static, use_hash=use_hash, link=link
+        )
+        manifest.save()
+        logger.info("Synced static files: %d copied, %d removed", copied, removed)
+        return
+    if os.path.exists("public"):
         rmtree("public")
-        copytree("static", "public", dirs_exist_ok=True)
-    except Exception as e:
-        print(e)
+    copytree("static", "public")
+    if os.path.exists(MANIFEST_PATH):
+        # Every page, listing and compressed sibling is written afresh, so
+        # what incremental builds recorded about them no longer holds.
+        manifest = Manifest(MANIFEST_PATH)
+        manifest.pages = {}
+        manifest.listings = {}
+        manifest.compressed = set()
+        manifest.static = {
+            os.path.relpath(os.path.join(root, f), "static")
+            for root, _, f_names in os.walk("static")
+            for f in f_names
+        }
+        manifest.save()
 
 
 def main():
-    static_to_public()
-    generate_page_recursive("content/", "templates/template.html", "public/")
+    parser = argparse.ArgumentParser(description="Static site generator")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["build", "watch", "deps"],
+        default="build",
+        help="build once, rebuild on changes and serve with live reload, "
+        "or print the dependency graph recorded by the last incremental build",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-render pages whose source or template changed",
+    )
+    parser.add_argument(
+        "--hash-static",
+        action="store_true",
+        help="With --incremental, compare static files by content when mtimes differ",
+    )
+    parser.add_argument(
+        "--link-static",
+        action="store_true",
+        help="With --incremental, hardlink static files instead of copying them",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Render pages on N worker processes (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Read sources and write pages on I/O threads while rendering, to hide "
+        "slow storage; ignored with --profile",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Reuse rendered pages from this content-addressed cache directory",
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=512, help="Render cache size limit in MB"
+    )
+    parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=MEMO_SIZE,
+        help="Repeated blocks/inline runs memoized per build (0 disables)",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8888, help="Port to serve on in watch mode"
+    )
+    parser.add_argument(
+        "--precompress",
+        type=str,
+        default="",
+        help=f"Comma-separated codecs to precompress text assets with ({', '.join(CODECS)})",
+    )
+    parser.add_argument(
+        "--precompress-min-size",
+        type=int,
+        default=1024,
+        help="Skip files smaller than this many bytes",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="Also render pages marked draft: true in their front matter",
+    )
+    parser.add_argument(
+        "--listings",
+        action="store_true",
+        help="Generate section, tag and archive listing pages from front matter",
+    )
+    parser.add_argument(
+        "--per-page", type=int, default=PER_PAGE, help="Entries per listing page"
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="Write a sharded search index to public/search/",
+    )
+    parser.add_argument(
+        "--site-url",
+        type=str,
+        default=None,
+        help="Write public/sitemap.xml with page URLs under this base URL",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="Strip comments and insignificant whitespace from the HTML as it is "
+        "written; <pre> and <code> are left alone",
+    )
+    parser.add_argument(
+        "--highlight",
+        action="store_true",
+        help="Syntax-highlight fenced code blocks in common languages",
+    )
+    parser.add_argument(
+        "--image-sizes",
+        action="store_true",
+        help="Add width/height from the image files plus lazy loading to <img> tags",
+    )
+    parser.add_argument(
+        "--srcset",
+        type=str,
+        default="",
+        help="With --image-sizes, comma-separated widths of downscaled variants "
+        "to generate and list in srcset (needs Pillow)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Time each build stage and page; writes {PROFILE_PATH} and {TRACE_PATH}",
+    )
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="count",
+        default=0,
+        help="Log progress (-v) or every page (-vv)",
+    )
+    args = parser.parse_args()
+
+    if args.command == "deps":
+        json.dump(Manifest(MANIFEST_PATH).graph(), sys.stdout, indent=1)
+        print()
+        return
+
+    image_sizes = None
+    if args.image_sizes:
+        widths = [int(w) for w in args.srcset.split(",") if w]
+        if widths and Image is None:
+            logger.warning("Pillow is not installed; skipping srcset variants")
+        image_sizes = ImageSizes("static", IMAGES_PATH, widths)
+
+    if args.command == "watch":
+        from watch import watch
+
+        configure_logging(args.verbose, default=logging.INFO, buffered=False)
+
+        static_to_public(True, args.hash_static, args.link_static)
+        watch(
+            "content/",
+            "static/",
+            "templates/",
+            "templates/template.html",
+            "public/",
+            MANIFEST_PATH,
+            port=args.port,
+            index_path=METADATA_PATH,
+            drafts=args.drafts,
+            listings=args.listings,
+            per_page=args.per_page,
+            search_path=SEARCH_PATH if args.search else None,
+            site_url=args.site_url,
+            image_sizes=image_sizes,
+            minify=args.minify,
+            highlight=args.highlight,
+        )
+        return
+
+    configure_logging(args.verbose)
+    profiler = Profiler() if args.profile else None
+    cache = None
+    if args.cache_dir:
+        cache = RenderCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    static_to_public(args.incremental, args.hash_static, args.link_static)
+    errors = generate_page_recursive(
+        "content/",
+        "templates/template.html",
+        "public/",
+        manifest_path=MANIFEST_PATH if args.incremental else None,
+        jobs=args.jobs or os.cpu_count() or 1,
+        cache=cache,
+        memo=args.memo_size,
+        profiler=profiler,
+        index_path=METADATA_PATH,
+        drafts=args.drafts,
+        listings=args.listings,
+        per_page=args.per_page,
+        search_path=SEARCH_PATH if args.search else None,
+        site_url=args.site_url,
+        image_sizes=image_sizes,
+        minify=args.minify,
+        pipeline=args.pipeline,
+        highlight=args.highlight,
+    )
+    stats = memo_stats()
+    for name in ("blocks", "inline"):
+        lookups = stats[name]["hits"] + stats[name]["misses"]
+        if lookups:
+            logger.info(
+                "Memo %s: %d/%d hits (%.1f%%)",
+                name,
+                stats[name]["hits"],
+                lookups,
+                100 * stats[name]["hits"] / lookups,
+            )
+    if cache is not None:
+        evicted = cache.prune()
+        print(
+            f"Render cache: {cache.hits} hits, {cache.misses} misses, {evicted} evicted"
+        )
+    if args.precompress:
+        manifest = Manifest(MANIFEST_PATH)
+        if manifest.compressed is None:
+            manifest.compressed = unshipped_siblings("public/", "static/")
+        precompress(
+            "public/",
+            codecs=args.precompress.split(","),
+            min_size=args.precompress_min_size,
+            generated=manifest.compressed,
+        )
+        manifest.save()
+    if profiler is not None:
+        profiler.write(PROFILE_PATH, TRACE_PATH)
+        print(profiler.report())
+    for md, error in errors:
+        logger.error("Failed to generate %s: %s", md, error)
+    logging.shutdown()
+    if errors:
+        sys.exit(1)
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+
+# Bumped when page output changes for everyone (see GENERATOR_VERSION), so
+# pages written by an older build are re-rendered.
+MANIFEST_VERSION = 2
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Manifest:
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        # Paths (relative to static/) that the static sync has copied into
+        # the output, so it can remove them once their source is gone.
+        self.static = set()
+        # Generated listing outputs and the digest of what each one shows.
+        self.listings = {}
+        # Compressed siblings (relative to the output) that precompress
+        # wrote; None when no manifest recorded them.
+        self.compressed = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        # Pages written by another version are re-rendered, but the files
+        # the other steps put in the output are still theirs to manage.
+        self.static = set(data.get("static", []))
+        self.listings = data.get("listings", {})
+        if "compressed" in data:
+            self.compressed = set(data["compressed"])
+        if data.get("version") == MANIFEST_VERSION:
+            self.pages = data.get("pages", {})
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "pages": self.pages,
+            "static": sorted(self.static),
+            "listings": self.listings,
+        }
+        if self.compressed is not None:
+            data["compressed"] = sorted(self.compressed)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def links_fresh(self, source, titles):
+        # True while every page this one links to by title still has the
+        # title it was rendered with.
+        links = self.pages.get(source, {}).get("links", {})
+        return all(titles.get(url) == title for url, title in links.items())
+
+    def images_fresh(self, source, image_sizes):
+        # True while every image on the page keeps the size it was
+        # rendered with.
+        for src, size in self.pages.get(source, {}).get("images", {}).items():
+            current = image_sizes.size(src)
+            if (list(current) if current else None) != size:
+                return False
+        return True
+
+    def is_fresh(
+        self,
+        source,
+        output,
+        template_hash,
+        titles=None,
+        image_sizes=None,
+        minify=False,
+        highlight=False,
+        image_widths=None,
+    ):
+        entry = self.pages.get(source)
+        if entry is None:
+            return False
+        if entry["output"] != output or entry["template_hash"] != template_hash:
+            return False
+        if entry.get("minify", False) != minify:
+            return False
+        if entry.get("highlight", False) != highlight:
+            return False
+        if entry.get("image_widths") != image_widths:
+            return False
+        if titles is not None and not self.links_fresh(source, titles):
+            return False
+        if image_sizes is not None and not self.images_fresh(source, image_sizes):
+            return False
+        if not os.path.exists(output):
+            return False
+        st = os.stat(source)
+        if entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return True
+        # Touched but possibly unchanged: fall back to the content hash.
+        if entry["source_hash"] != file_hash(source):
+            return False
+        entry["mtime_ns"] = st.st_mtime_ns
+        entry["size"] = st.st_size
+        return True
+
+    def record(
+        self,
+        source,
+        output,
+        template_path,
+        template_hash,
+        deps=None,
+        links=None,
+        images=None,
+        minify=False,
+        highlight=False,
+        image_widths=None,
+    ):
+        # deps: the template and the partials it includes; links: URL ->
+        # title of the pages whose titles this page shows; images: src ->
+        # [width, height] it was rendered with; minify, highlight: whether
+        # the output was minified and its code blocks highlighted;
+        # image_widths: None without image sizing, else the srcset widths.
+        st = os.stat(source)
+        self.pages[source] = {
+            "source_hash": file_hash(source),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "template_hash": template_hash,
+            "output": output,
+            "deps": list(deps) if deps else [template_path],
+            "links": links or {},
+            "images": images or {},
+            "minify": minify,
+            "highlight": highlight,
+            "image_widths": image_widths,
+        }
+
+    def graph(self):
+        # Page -> dependencies, and the reverse, for inspection.
+        pages = {
+            source: {
+                "output": entry["output"],
+                "deps": entry["deps"],
+                "links": sorted(entry.get("links", {})),
+                "images": sorted(entry.get("images", {})),
+            }
+            for source, entry in sorted(self.pages.items())
+        }
+        dependents = {}
+        for source, entry in pages.items():
+            for dep in entry["deps"] + entry["links"] + entry["images"]:
+                dependents.setdefault(dep, []).append(source)
+        return {"pages": pages, "dependents": dependents}
+
+    def forget(self, source):
+        entry = self.pages.pop(source, None)
+        if entry is None:
+            return None
+        output = entry["output"]
+        if os.path.exists(output):
+            os.remove(output)
+        return output
+
+    def remove_missing(self, sources):
+        removed = []
+        for source in list(self.pages):
+            if source not in sources:
+                removed.append(self.forget(source))
+        return removed
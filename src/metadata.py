@@ -0,0 +1,153 @@
+import json
+import os
+from itertools import chain
+
+from textnode import BlockTypes, iter_blocks, parse_block
+
+METADATA_VERSION = 1
+FRONT_MATTER_FENCE = "---"
+
+
+def parse_value(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item) for item in value[1:-1].split(",") if item.strip()]
+    if value.lower() in ("true", "yes"):
+        return True
+    if value.lower() in ("false", "no"):
+        return False
+    return value
+
+
+def split_front_matter(lines):
+    # Consume an optional `---` delimited header of `key: value` lines
+    # (values may be [inline, lists] or `- item` lines under an empty key)
+    # and hand back the remaining lines unread.
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, lines
+    if first.rstrip("\r\n") != FRONT_MATTER_FENCE:
+        return {}, chain([first], lines)
+    meta = {}
+    key = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if stripped == FRONT_MATTER_FENCE:
+            return meta, lines
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None:
+            if not isinstance(meta[key], list):
+                meta[key] = []
+            meta[key].append(parse_value(stripped[2:]))
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise ValueError(f"Invalid front matter line: {line!r}")
+        key = name.strip().lower()
+        meta[key] = parse_value(value) if value.strip() else []
+    raise ValueError("Front matter not closed")
+
+
+def title_from_meta(meta, first_block):
+    if meta.get("title"):
+        return str(meta["title"])
+    if first_block is None:
+        raise Exception("Page must have a heading. An h1.")
+    block_type, heading = parse_block(first_block)
+    if block_type != BlockTypes.block_type_heading.value[0]:
+        raise Exception("Page must have a heading. An h1.")
+    return heading[1].strip()
+
+
+def read_metadata(path):
+    # Reads the front matter and the first block only, never the body.
+    with open(path, "r") as f:
+        meta, lines = split_front_matter(f)
+        first = next(iter_blocks(lines), None)
+    try:
+        meta["title"] = title_from_meta(meta, first)
+    except Exception:
+        meta["title"] = None
+    tags = meta.get("tags", [])
+    meta["tags"] = [tags] if isinstance(tags, str) else [str(tag) for tag in tags]
+    meta["draft"] = meta.get("draft") is True
+    if "date" in meta:
+        meta["date"] = str(meta["date"])
+    return meta
+
+
+class MetadataIndex:
+    def __init__(self, path=None):
+        # With no path the index lives for one build only.
+        self.path = path
+        self.pages = {}
+        self.load()
+
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != METADATA_VERSION:
+            return
+        self.pages = data.get("pages", {})
+
+    def save(self):
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": METADATA_VERSION, "pages": self.pages}, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def update(self, sources):
+        # Re-read the headers of sources whose mtime or size changed and
+        # drop entries for sources that are gone. Returns the changed ones.
+        changed = set()
+        for source in sources:
+            try:
+                st = os.stat(source)
+            except FileNotFoundError:
+                if self.pages.pop(source, None) is not None:
+                    changed.add(source)
+                continue
+            entry = self.pages.get(source)
+            if (
+                entry is not None
+                and entry["mtime_ns"] == st.st_mtime_ns
+                and entry["size"] == st.st_size
+            ):
+                continue
+            try:
+                meta = read_metadata(source)
+            except (ValueError, UnicodeDecodeError) as e:
+                # Leave the error for the render step to report.
+                meta = {"title": None, "tags": [], "draft": False, "error": str(e)}
+            self.pages[source] = {
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "meta": meta,
+            }
+            changed.add(source)
+        return changed
+
+    def remove_missing(self, sources):
+        for source in list(self.pages):
+            if source not in sources:
+                del self.pages[source]
+
+    def get(self, source):
+        entry = self.pages.get(source)
+        return None if entry is None else entry["meta"]
+
+    def is_draft(self, source):
+        meta = self.get(source)
+        return meta is not None and meta["draft"]
@@ -0,0 +1,250 @@
+import re
+
+# Whitespace next to these tags never renders, so it is dropped rather than
+# collapsed to one space. Unknown tags are treated as inline.
+BLOCK_TAGS = frozenset(
+    """
+    !doctype address article aside blockquote body dd details div dl dt
+    fieldset figcaption figure footer form h1 h2 h3 h4 h5 h6 head header hr
+    html li link main meta nav noscript ol p pre section summary table tbody
+    td tfoot th thead title tr ul
+    """.split()
+)
+# Contents kept byte for byte.
+RAW_TAGS = ("pre", "code", "textarea", "script", "style")
+WHITESPACE = frozenset(" \t\n\r\f")
+SEPARATORS = WHITESPACE | {">"}
+
+
+def _alternatives(words):
+    # Alternation factored by first letter, so a non-matching name is
+    # rejected after one or two characters instead of one try per word.
+    groups = {}
+    for word in words:
+        groups.setdefault(word[0], []).append(word[1:])
+    parts = []
+    for first, rests in sorted(groups.items()):
+        tails = [rest for rest in rests if rest]
+        tail = _alternatives(tails) if tails else ""
+        if tails and len(tails) < len(rests):
+            tail = f"(?:{tail})?"
+        parts.append(re.escape(first) + tail)
+    return parts[0] if len(parts) == 1 else f"(?:{'|'.join(parts)})"
+
+
+def _any_case(word):
+    return "".join(f"[{c}{c.upper()}]" for c in word)
+
+
+_block = _alternatives(sorted(BLOCK_TAGS - {"!doctype"}))
+# Each pattern starts with a literal, so the regex engine skips straight to
+# candidates instead of trying every character; plain text and inline
+# markup are never looked at from Python.
+NEWLINE_RUN = re.compile(r"\n[ \n]*")
+WHITESPACE_RUN = re.compile(r"[\t\n\r\f][ \t\n\r\f]*")
+QUOTED = re.compile(r"""=(["'])([A-Za-z0-9_.:-]+)\1""")
+COMMENT = re.compile(r"<!--.*?-->([ \t\n\r\f]*)", re.S)
+BLOCK_START = re.compile(rf"</?(?:{_block})[\s/>]")
+TAG_NAME = re.compile(r"</?([A-Za-z!][^\s/>]*)")
+_raw_first = "".join(sorted({tag[0] for tag in RAW_TAGS}))
+# The lookahead turns most other tags away on their first letter.
+RAW_OPEN = re.compile(
+    rf"<(?=[{_raw_first}{_raw_first.upper()}])"
+    rf"({'|'.join(map(_any_case, RAW_TAGS))})(?=[\s/>])[^>]*>"
+)
+RAW_CLOSE = {name: re.compile(rf"</{name}\s*>", re.I) for name in RAW_TAGS}
+# Held back while inside a raw element, in case its closing tag is split
+# across chunks.
+RAW_TAIL = len("</textarea>") + 8
+# Chunks are batched to about this many characters before minifying, so
+# the per-call overhead is not paid for every tiny chunk.
+BATCH_SIZE = 16 * 1024
+
+
+def in_tag(buf, i):
+    return buf.rfind("<", 0, i) > buf.rfind(">", 0, i)
+
+
+def block_before(buf, i, start=True):
+    # Whether buf[:i] ends with the tag of a block element; start: whether
+    # what came before buf did.
+    if i == 0:
+        return start
+    if buf[i - 1] != ">":
+        return False
+    match = TAG_NAME.match(buf, buf.rfind("<", 0, i - 1))
+    return match is not None and match.group(1).lower() in BLOCK_TAGS
+
+
+def outside(end, raw_spans):
+    pos = 0
+    for start, stop in raw_spans:
+        if start > pos:
+            yield pos, start
+        pos = stop
+    if end > pos:
+        yield pos, end
+
+
+def edits_for(buf, end, raw_spans, prev="", prev_block=True):
+    # (start, end, replacement) spans. They may overlap each other or a
+    # raw span; apply_edits sorts that out. prev, prev_block: the last
+    # character before buf and whether it closed a block tag.
+    edits = []
+    if buf.find("<!--", 0, end) != -1:
+        for match in COMMENT.finditer(buf, 0, end):
+            # Keep one space if the comment was all that separated two
+            # words.
+            before = buf[match.start() - 1] if match.start() else prev
+            space = match.group(1) and not (
+                before in WHITESPACE
+                or block_before(buf, match.start(), prev_block)
+                or BLOCK_START.match(buf, match.end())
+            )
+            edits.append((match.start(), match.end(), " " if space else ""))
+    run = NEWLINE_RUN
+    if buf.find("\t", 0, end) != -1 or buf.find("\r", 0, end) != -1:
+        run = WHITESPACE_RUN
+    # Code blocks are full of newlines; skip them up front.
+    for start, stop in outside(end, raw_spans):
+        for match in run.finditer(buf, start, stop):
+            ws = match.start()
+            while ws > start and buf[ws - 1] == " ":
+                ws -= 1
+            if in_tag(buf, ws):
+                continue
+            drop = block_before(buf, ws, prev_block) or BLOCK_START.match(
+                buf, match.end()
+            )
+            edits.append((ws, match.end(), "" if drop else " "))
+    # Nearly every page has quoted attributes, so no find() guard here.
+    for match in QUOTED.finditer(buf, 0, end):
+        # Unquoted before "/>" the value would swallow the slash.
+        if buf[match.end() : match.end() + 1] in SEPARATORS and in_tag(
+            buf, match.start()
+        ):
+            edits.append((match.start() + 1, match.end(), match.group(2)))
+    return edits
+
+
+def apply_edits(buf, end, edits, raw_spans, out):
+    # Overlapping edits are applied first come first served; any touching
+    # a raw span are skipped.
+    edits.sort()
+    pos = 0
+    raw = iter(raw_spans)
+    raw_start, raw_end = next(raw, (end, end))
+    for edit_start, edit_end, text in edits:
+        if edit_start < pos:
+            continue
+        while raw_end <= edit_start and raw_start < end:
+            raw_start, raw_end = next(raw, (end, end))
+        if edit_end > raw_start and edit_start < raw_end:
+            continue
+        out.append(buf[pos:edit_start])
+        out.append(text)
+        pos = edit_end
+    out.append(buf[pos:end])
+
+
+def safe_end(buf):
+    # How far the buffer can be minified without seeing the next chunk:
+    # up to the last tag, minus any whitespace (and the tags around it)
+    # whose treatment depends on that tag.
+    cut = buf.rfind("<")
+    if cut == -1:
+        # A text run is only complete once the next tag starts.
+        return 0
+    comment = buf.rfind("<!--")
+    if comment != -1 and buf.find("-->", comment) == -1:
+        cut = comment
+    while cut > 0:
+        ws = cut
+        while ws > 0 and buf[ws - 1] in WHITESPACE:
+            ws -= 1
+        if ws == cut or ws == 0:
+            return ws
+        if buf[ws - 1] != ">":
+            # Keep the last character of the text with the whitespace, so
+            # the next chunk still sees that it follows text.
+            return ws - 1
+        cut = max(buf.rfind("<", 0, ws - 1), 0)
+    return 0
+
+
+class Minifier:
+    # Incremental HTML minifier: feed() it chunks as they are produced and
+    # it returns what can be written so far, holding back only a trailing
+    # unfinished tag or text run. Whitespace runs spanning a line break are
+    # dropped next to block tags and collapsed to one space elsewhere; single
+    # spaces are already as short as they get and are left alone. Comments
+    # and quotes around attribute values that do not need them are dropped.
+    # <pre>, <code>, <textarea>, <script> and <style> contents pass through
+    # untouched.
+    def __init__(self):
+        self.buffer = ""
+        # What the last character fed out was, and whether it closed a
+        # block tag; whitespace at the start of the buffer depends on it.
+        self.prev = ""
+        self.prev_block = True
+        self.raw = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def feed(self, chunk, final=False):
+        self.bytes_in += len(chunk)
+        buf = self.buffer + chunk
+        end = len(buf) if final else safe_end(buf)
+        raw_spans = []
+        pos = 0
+        while True:
+            if self.raw is not None:
+                close = RAW_CLOSE[self.raw].search(buf, pos)
+                if close is None:
+                    end = len(buf) if final else max(pos, len(buf) - RAW_TAIL)
+                    raw_spans.append((pos, end))
+                    break
+                raw_spans.append((pos, close.start()))
+                pos = close.start()
+                self.raw = None
+            raw = RAW_OPEN.search(buf, pos, end)
+            if raw is None:
+                end = max(pos, end)
+                break
+            pos = raw.end()
+            self.raw = raw.group(1).lower()
+        out = []
+        edits = edits_for(buf, end, raw_spans, self.prev, self.prev_block)
+        apply_edits(buf, end, edits, raw_spans, out)
+        if end:
+            self.prev = buf[end - 1]
+            self.prev_block = block_before(buf, end, self.prev_block)
+        self.buffer = buf[end:]
+        html = "".join(out)
+        self.bytes_out += len(html)
+        return html
+
+    def close(self):
+        return self.feed("", final=True)
+
+
+def minify_stream(chunks, minifier=None):
+    minifier = minifier or Minifier()
+    batch = []
+    size = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        size += len(chunk)
+        if size >= BATCH_SIZE:
+            html = minifier.feed("".join(batch))
+            if html:
+                yield html
+            batch = []
+            size = 0
+    html = minifier.feed("".join(batch), final=True)
+    if html:
+        yield html
+
+
+def minify(html):
+    return "".join(minify_stream([html]))
@@ -0,0 +1,50 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Items read ahead of, and outputs waiting behind, the processing stage.
+DEPTH = 32
+IO_THREADS = 4
+
+
+def run_pipeline(items, read, process, write, depth=DEPTH, threads=IO_THREADS):
+    # read(item) and write(item, output) run on I/O threads, process(item,
+    # data) on the calling thread, so file latency overlaps with the CPU
+    # work. At most `depth` items are read ahead and at most `depth` outputs
+    # wait to be written; past that the stage feeding them blocks. process()
+    # may return None for nothing to write. Returns (item, exception) for
+    # each item whose stage raised; the others still go through.
+    failed = []
+    slots = threading.BoundedSemaphore(depth)
+
+    def written(item, future):
+        slots.release()
+        if future.exception() is not None:
+            failed.append((item, future.exception()))
+
+    with ThreadPoolExecutor(max_workers=threads) as io:
+        items = iter(items)
+        pending = deque()
+
+        def read_ahead():
+            for item in items:
+                pending.append((item, io.submit(read, item)))
+                if len(pending) >= depth:
+                    return
+
+        read_ahead()
+        while pending:
+            item, future = pending.popleft()
+            read_ahead()
+            try:
+                output = process(item, future.result())
+            except Exception as e:
+                failed.append((item, e))
+                continue
+            if output is None:
+                continue
+            slots.acquire()
+            io.submit(write, item, output).add_done_callback(
+                lambda future, item=item: written(item, future)
+            )
+    return failed
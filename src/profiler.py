@@ -0,0 +1,89 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+STAGES = (
+    "discovery",
+    "read",
+    "block split",
+    "inline parse",
+    "html serialization",
+    "template render",
+    "write",
+)
+
+
+class Profiler:
+    def __init__(self):
+        self.stages = {}
+        self.pages = {}
+        # Chrome trace "complete" events; perf_counter is a system-wide
+        # monotonic clock, so worker timelines line up with the parent's.
+        self.events = []
+
+    @contextmanager
+    def stage(self, name, page=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": elapsed * 1e6,
+                "pid": os.getpid(),
+                "tid": os.getpid(),
+            }
+            if page is not None:
+                event["args"] = {"page": page}
+            self.events.append(event)
+
+    @contextmanager
+    def page(self, path):
+        start = time.perf_counter()
+        with self.stage("page", page=path):
+            yield
+        self.pages[path] = time.perf_counter() - start
+
+    def data(self):
+        return {"stages": self.stages, "pages": self.pages, "events": self.events}
+
+    def merge(self, data):
+        for name, elapsed in data["stages"].items():
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+        self.pages.update(data["pages"])
+        self.events.extend(data["events"])
+
+    def slowest(self, n=10):
+        return sorted(self.pages.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def report(self, n=10):
+        lines = ["Stage                  seconds"]
+        for name in STAGES + tuple(s for s in self.stages if s not in STAGES + ("page",)):
+            if name in self.stages:
+                lines.append(f"{name:<20} {self.stages[name]:9.4f}")
+        lines.append(f"Slowest {min(n, len(self.pages))} of {len(self.pages)} pages")
+        for path, elapsed in self.slowest(n):
+            lines.append(f"{elapsed * 1000:9.2f} ms  {path}")
+        return "\n".join(lines)
+
+    def write(self, json_path, trace_path):
+        for path in (json_path, trace_path):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        with open(json_path, "w") as f:
+            json.dump(
+                {
+                    "stages": self.stages,
+                    "pages": dict(self.slowest(len(self.pages))),
+                },
+                f,
+                indent=1,
+            )
+        with open(trace_path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
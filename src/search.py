@@ -0,0 +1,126 @@
+import json
+import os
+import re
+from collections import Counter
+from html import unescape
+
+# Bumped when terms_for() changes, so pages indexed before are re-indexed.
+SEARCH_VERSION = 2
+TERM = re.compile(r"\w{2,}")
+
+
+def terms_for(text):
+    # text: iterable of text chunks from HTMLNode.iter_text(). Code leaves
+    # hold escaped HTML; index the text as the reader sees it.
+    counts = Counter()
+    for chunk in text:
+        counts.update(TERM.findall(unescape(chunk).lower()))
+    return dict(counts)
+
+
+def shard_for(term):
+    first = term[0]
+    return first if first.isascii() and first.isalnum() else "_"
+
+
+class SearchIndex:
+    # Inverted index split into one JSON shard per leading character.
+    # Documents keep stable ids across builds, so a changed page only
+    # rewrites the shards holding terms it gained or lost.
+    def __init__(self, path):
+        self.path = path
+        self.ids = {}
+        self.docs = {}
+        self.next_id = 0
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != SEARCH_VERSION:
+            return
+        self.ids = data["ids"]
+        self.docs = {int(doc_id): doc for doc_id, doc in data["docs"].items()}
+        self.next_id = max(self.docs, default=-1) + 1
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": SEARCH_VERSION, "ids": self.ids, "docs": self.docs}, f)
+        os.replace(tmp, self.path)
+
+    def update(self, source, url, title, terms):
+        # Returns the shards whose contents change.
+        doc_id = self.ids.get(source)
+        if doc_id is None:
+            doc_id = self.ids[source] = self.next_id
+            self.next_id += 1
+            old = {"url": None, "title": None, "terms": {}}
+        else:
+            old = self.docs[doc_id]
+        doc = {"url": url, "title": title, "terms": terms}
+        self.docs[doc_id] = doc
+        touched = {
+            shard_for(term)
+            for term in old["terms"].keys() | terms.keys()
+            if old["terms"].get(term) != terms.get(term)
+        }
+        if (old["url"], old["title"]) != (url, title):
+            touched.add("docs")
+        return touched
+
+    def remove(self, source):
+        doc_id = self.ids.pop(source, None)
+        if doc_id is None:
+            return set()
+        doc = self.docs.pop(doc_id)
+        return {shard_for(term) for term in doc["terms"]} | {"docs"}
+
+    def retitle(self, source, url, title):
+        doc_id = self.ids.get(source)
+        if doc_id is None:
+            return set()
+        doc = self.docs[doc_id]
+        if (doc["url"], doc["title"]) == (url, title):
+            return set()
+        doc["url"] = url
+        doc["title"] = title
+        return {"docs"}
+
+    def shard_names(self):
+        return {shard_for(term) for doc in self.docs.values() for term in doc["terms"]}
+
+    def shards(self, names):
+        postings = {name: {} for name in names}
+        for doc_id, doc in sorted(self.docs.items()):
+            for term, count in doc["terms"].items():
+                shard = postings.get(shard_for(term))
+                if shard is not None:
+                    shard.setdefault(term, []).append([doc_id, count])
+        return postings
+
+    def write(self, directory, shards):
+        # Writes docs.json (id -> [url, title]) and the given term shards;
+        # shards left empty are removed.
+        os.makedirs(directory, exist_ok=True)
+        contents = self.shards(shards - {"docs"})
+        if "docs" in shards:
+            contents["docs"] = {
+                doc_id: [doc["url"], doc["title"]] for doc_id, doc in sorted(self.docs.items())
+            }
+        for name, data in contents.items():
+            path = os.path.join(directory, f"{name}.json")
+            if not data:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(dict(sorted(data.items())), f, separators=(",", ":"))
+            os.replace(tmp, path)
+        return len(contents)
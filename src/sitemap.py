@@ -0,0 +1,64 @@
+import os
+from xml.sax.saxutils import escape
+
+MAX_URLS = 50_000
+XMLNS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def urlset(entries):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<urlset xmlns="{XMLNS}">']
+    for loc, lastmod in entries:
+        if lastmod:
+            lines.append(
+                f"<url><loc>{escape(loc)}</loc><lastmod>{escape(lastmod)}</lastmod></url>"
+            )
+        else:
+            lines.append(f"<url><loc>{escape(loc)}</loc></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def sitemap_index(locs):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{XMLNS}">']
+    lines.extend(f"<sitemap><loc>{escape(loc)}</loc></sitemap>" for loc in locs)
+    lines.append("</sitemapindex>")
+    return "\n".join(lines) + "\n"
+
+
+def write_if_changed(path, text):
+    try:
+        with open(path, "r") as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return True
+
+
+def write_sitemap(dest_dir_path, site_url, entries, max_urls=MAX_URLS):
+    # entries: (path, lastmod) pairs, path starting with "/". Up to max_urls
+    # go in sitemap.xml; beyond that it becomes an index of sitemap-N.xml
+    # files. Returns the number of files rewritten.
+    site_url = site_url.rstrip("/")
+    entries = sorted((site_url + path, lastmod) for path, lastmod in entries)
+    chunks = [entries[i : i + max_urls] for i in range(0, len(entries), max_urls)] or [[]]
+    files = {}
+    if len(chunks) == 1:
+        files["sitemap.xml"] = urlset(chunks[0])
+    else:
+        for n, chunk in enumerate(chunks, 1):
+            files[f"sitemap-{n}.xml"] = urlset(chunk)
+        files["sitemap.xml"] = sitemap_index(
+            f"{site_url}/sitemap-{n}.xml" for n in range(1, len(chunks) + 1)
+        )
+    os.makedirs(dest_dir_path, exist_ok=True)
+    for name in os.listdir(dest_dir_path):
+        if name.startswith("sitemap-") and name.endswith(".xml") and name not in files:
+            os.remove(os.path.join(dest_dir_path, name))
+    return sum(
+        write_if_changed(os.path.join(dest_dir_path, name), text) for name, text in files.items()
+    )
@@ -0,0 +1,97 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import file_hash
+
+
+def same_file(src_st, dst_path, src_path, use_hash):
+    try:
+        dst_st = os.stat(dst_path)
+    except FileNotFoundError:
+        return False
+    if (src_st.st_dev, src_st.st_ino) == (dst_st.st_dev, dst_st.st_ino):
+        return True
+    if src_st.st_size != dst_st.st_size:
+        return False
+    if src_st.st_mtime_ns == dst_st.st_mtime_ns:
+        return True
+    if use_hash and file_hash(src_path) == file_hash(dst_path):
+        shutil.copystat(src_path, dst_path)
+        return True
+    return False
+
+
+def copy_range(src, dst):
+    # copy_file_range lets the kernel share or clone extents when both files
+    # are on the same filesystem (a reflink on btrfs/XFS).
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def copy_file(src, dst, link=False):
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp = f"{dst}.sync-tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    if link:
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dst)
+            return
+        except OSError:
+            pass
+    try:
+        copy_range(src, tmp)
+    except (AttributeError, OSError):
+        shutil.copyfile(src, tmp)
+    shutil.copystat(src, tmp)
+    os.replace(tmp, dst)
+
+
+def remove_empty_dirs(path, root):
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    while path != root and path.startswith(root) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
+
+
+def remove_file(dst, root):
+    if os.path.isfile(dst):
+        os.remove(dst)
+    remove_empty_dirs(os.path.dirname(dst), root)
+
+
+def sync_tree(src, dst, synced, use_hash=False, link=False, workers=8):
+    # Mirror src into dst, copying only files whose size or mtime differ and
+    # removing files a previous sync copied whose source is gone. `synced`
+    # is the set of relative paths copied before; it is updated in place.
+    os.makedirs(dst, exist_ok=True)
+    link = link and os.stat(src).st_dev == os.stat(dst).st_dev
+    current = set()
+    jobs = []
+    for root, _, f_names in os.walk(src):
+        for f in f_names:
+            src_path = os.path.join(root, f)
+            rel = os.path.relpath(src_path, src)
+            current.add(rel)
+            dst_path = os.path.join(dst, rel)
+            if not same_file(os.stat(src_path), dst_path, src_path, use_hash):
+                jobs.append((src_path, dst_path))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # list() re-raises the first copy error instead of swallowing it.
+        list(pool.map(lambda job: copy_file(*job, link=link), jobs))
+
+    removed = sorted(synced - current)
+    for rel in removed:
+        remove_file(os.path.join(dst, rel), dst)
+    synced.clear()
+    synced.update(current)
+    return len(jobs), len(removed)
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import re
+
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+PARTIAL = re.compile(r"\{\{>\s*([\w./-]+)\s*\}\}")
+
+_cache = {}
+
+
+class Template:
+    def __init__(self, text, deps=()):
+        # Files the text was loaded from: the template, then its partials.
+        self.deps = list(deps)
+        self.digest = hashlib.sha256(text.encode()).hexdigest()
+        # segments[i] is the literal text before slots[i]; the last segment
+        # trails the final slot.
+        self.segments = []
+        self.slots = []
+        pos = 0
+        for match in PLACEHOLDER.finditer(text):
+            self.segments.append(text[pos : match.start()])
+            self.slots.append((match.group(1), match.group(0)))
+            pos = match.end()
+        self.segments.append(text[pos:])
+
+    def render(self, context):
+        return "".join(self.stream(context))
+
+    def stream(self, context):
+        # Values may be strings or iterables of chunks (e.g. iter_html()),
+        # which are passed through without being joined.
+        yield self.segments[0]
+        for (name, raw), literal in zip(self.slots, self.segments[1:]):
+            value = context.get(name, raw)
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            yield literal
+
+    def __repr__(self):
+        return f"Template({[name for name, _ in self.slots]})"
+
+
+def partial_path(name, directory):
+    path = os.path.join(directory, name)
+    if not os.path.splitext(path)[1]:
+        path += ".html"
+    return path
+
+
+def expand_partials(text, directory, deps, including=()):
+    # Partial names resolve against the top-level template's directory and
+    # may include further partials.
+    def include(match):
+        path = partial_path(match.group(1), directory)
+        if path in including:
+            raise ValueError(f"Partial {path} includes itself")
+        with open(path, "r") as f:
+            partial = f.read()
+        if path not in deps:
+            deps.append(path)
+        return expand_partials(partial, directory, deps, including + (path,))
+
+    return PARTIAL.sub(include, text)
+
+
+def _mtimes(paths):
+    try:
+        return tuple(os.stat(path).st_mtime_ns for path in paths)
+    except FileNotFoundError:
+        return None
+
+
+def load_template(path):
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == _mtimes(cached[1].deps):
+        return cached[1]
+    with open(path, "r") as f:
+        text = f.read()
+    deps = [path]
+    template = Template(expand_partials(text, os.path.dirname(path), deps, (path,)), deps)
+    _cache[path] = (_mtimes(deps), template)
+    return template
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from cache import RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(os.path.join(self.tmp.name, "cache"), max_bytes=10)
+        self.source = self.write("page.md", "# Page\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(data)
+        return path
+
+    def test_key_covers_source_template_and_version(self):
+        key = self.cache.key(self.source, "t1", "1")
+        self.assertEqual(key, self.cache.key(self.source, "t1", "1"))
+        self.assertNotEqual(key, self.cache.key(self.source, "t2", "1"))
+        self.assertNotEqual(key, self.cache.key(self.source, "t1", "2"))
+        self.write("page.md", "# Changed\n")
+        self.assertNotEqual(key, self.cache.key(self.source, "t1", "1"))
+
+    def test_store_and_fetch(self):
+        dest = os.path.join(self.tmp.name, "page.html")
+        self.assertFalse(self.cache.fetch("ab" * 32, dest))
+        self.assertFalse(os.path.exists(dest))
+        self.cache.store("ab" * 32, self.write("rendered.html", "<h1>Page</h1>"))
+        self.assertTrue(self.cache.fetch("ab" * 32, dest))
+        with open(dest) as f:
+            self.assertEqual(f.read(), "<h1>Page</h1>")
+
+    def test_prune_evicts_least_recently_used(self):
+        rendered = self.write("rendered.html", "123456")
+        self.cache.store("aa" * 32, rendered)
+        self.cache.store("bb" * 32, rendered)
+        os.utime(self.cache.path_for("aa" * 32), ns=(0, 0))
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertFalse(os.path.exists(self.cache.path_for("aa" * 32)))
+        self.assertTrue(os.path.exists(self.cache.path_for("bb" * 32)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import precompress, unshipped_siblings
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.page = os.path.join(self.tmp.name, "index.html")
+        with open(self.page, "w") as f:
+            f.write("<p>hello</p>" * 200)
+        with open(os.path.join(self.tmp.name, "small.css"), "w") as f:
+            f.write("p{}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_gzip_siblings_above_threshold(self):
+        self.assertEqual(precompress(self.tmp.name, min_size=100), 1)
+        with gzip.open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), b"<p>hello</p>" * 200)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "small.css.gz")))
+
+    def test_skips_up_to_date_and_removes_orphans(self):
+        generated = set()
+        codecs = ("gzip", "bz2")
+        precompress(self.tmp.name, codecs=codecs, min_size=100, generated=generated)
+        self.assertEqual(generated, {"index.html.gz", "index.html.bz2"})
+        self.assertEqual(
+            precompress(self.tmp.name, codecs=codecs, min_size=100, generated=generated), 0
+        )
+        os.remove(self.page)
+        precompress(self.tmp.name, codecs=codecs, min_size=100, generated=generated)
+        self.assertEqual(os.listdir(self.tmp.name), ["small.css"])
+        self.assertEqual(generated, set())
+
+    def test_recorded_sibling_deleted(self):
+        generated = set()
+        precompress(self.tmp.name, min_size=100, generated=generated)
+        os.remove(self.page + ".gz")
+        self.assertEqual(precompress(self.tmp.name, min_size=100, generated=generated), 1)
+        self.assertEqual(generated, {"index.html.gz"})
+        os.remove(self.page + ".gz")
+        os.remove(self.page)
+        precompress(self.tmp.name, min_size=100, generated=generated)
+        self.assertEqual(generated, set())
+
+    def test_leaves_shipped_archives_alone(self):
+        shipped = os.path.join(self.tmp.name, "data.json.gz")
+        with open(shipped, "wb") as f:
+            f.write(gzip.compress(b"{}"))
+        with open(self.page + ".gz", "wb") as f:
+            f.write(b"hand-made")
+        generated = set()
+        self.assertEqual(precompress(self.tmp.name, min_size=100, generated=generated), 0)
+        self.assertTrue(os.path.exists(shipped))
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), b"hand-made")
+        self.assertEqual(generated, set())
+
+    def test_unshipped_siblings(self):
+        with tempfile.TemporaryDirectory() as static:
+            for root in (self.tmp.name, static):
+                with open(os.path.join(root, "data.json.gz"), "wb") as f:
+                    f.write(gzip.compress(b"{}"))
+            precompress(self.tmp.name, min_size=100)
+            self.assertEqual(unshipped_siblings(self.tmp.name, static), {"index.html.gz"})
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            precompress(self.tmp.name, codecs=("lz4",))
+
+
+if __name__ == "__main__":
+    unittest.main()
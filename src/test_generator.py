@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+
+from generator import generate_page_recursive
+from manifest import Manifest
+
+TEMPLATE = "<title>{{ Title }}</title>\n<article>{{ Content }}</article>\n"
+
+
+class TestGeneratePageRecursive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+        for n in range(6):
+            self.write_page(f"section{n % 2}/page{n}.md", f"# Page {n}\n\n*body* {n}\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_page(self, rel, markdown):
+        path = os.path.join(self.content, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(markdown)
+
+    def build(self, name, **kwargs):
+        dest = os.path.join(self.tmp.name, name) + "/"
+        errors = generate_page_recursive(self.content, self.template, dest, **kwargs)
+        outputs = {}
+        for root, _, f_names in os.walk(dest):
+            for f in f_names:
+                with open(os.path.join(root, f), "rb") as html:
+                    outputs[os.path.relpath(os.path.join(root, f), dest)] = html.read()
+        return errors, outputs
+
+    def test_parallel_matches_serial(self):
+        _, serial = self.build("serial")
+        _, parallel = self.build("parallel", jobs=3)
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(serial, parallel)
+
+    def test_errors_do_not_abort_build(self):
+        self.write_page("broken.md", "no heading here\n")
+        errors, outputs = self.build("public", jobs=2)
+        self.assertEqual([md for md, _ in errors], [os.path.join(self.content, "broken.md")])
+        self.assertEqual(len(outputs), 6)
+
+
+class TestDependencies(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "public") + "/"
+        self.templates = os.path.join(self.tmp.name, "templates")
+        self.manifest = os.path.join(self.tmp.name, "manifest.json")
+        self.write(self.templates, "template.html", "{{ Content }}")
+        self.write(self.templates, "post.html", "<article>{{ Content }}</article>{{> foot }}")
+        self.write(self.templates, "foot.html", "<footer/>")
+        self.write(self.content, "index.md", "# Home\n\nSee [](/post.html)\n")
+        self.write(self.content, "post.md", "---\ntemplate: post.html\n---\n# Post\n")
+        self.write(self.content, "other.md", "# Other\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, directory, rel, text):
+        path = os.path.join(directory, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        # Make every rewrite visible to mtime checks.
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    def build(self):
+        # Returns the outputs written, spotting them by their reset mtimes.
+        errors = generate_page_recursive(
+            self.content,
+            os.path.join(self.templates, "template.html"),
+            self.dest,
+            manifest_path=self.manifest,
+        )
+        self.assertEqual(errors, [])
+        rebuilt = set()
+        for name in ("index.html", "post.html", "other.html"):
+            path = os.path.join(self.dest, name)
+            if os.stat(path).st_mtime_ns != 0:
+                rebuilt.add(name)
+            os.utime(path, ns=(0, 0))
+        return rebuilt
+
+    def read(self, name):
+        with open(os.path.join(self.dest, name)) as f:
+            return f.read()
+
+    def test_templates_partials_and_links(self):
+        self.assertEqual(self.build(), {"index.html", "post.html", "other.html"})
+        self.assertEqual(
+            self.read("post.html"), "<article><div><h1>Post</h1></div></article><footer/>"
+        )
+        self.assertIn('<a href="/post.html">Post</a>', self.read("index.html"))
+        self.assertEqual(self.build(), set())
+
+        # A partial only invalidates the pages whose template includes it.
+        self.write(self.templates, "foot.html", "<footer>new</footer>")
+        self.assertEqual(self.build(), {"post.html"})
+
+        # A title change re-renders the pages linking to it by title.
+        self.write(self.content, "post.md", "---\ntemplate: post.html\n---\n# Renamed\n")
+        self.assertEqual(self.build(), {"post.html", "index.html"})
+        self.assertIn('<a href="/post.html">Renamed</a>', self.read("index.html"))
+
+        # Editing the body without touching the title does not.
+        self.write(
+            self.content, "post.md", "---\ntemplate: post.html\n---\n# Renamed\n\nbody\n"
+        )
+        self.assertEqual(self.build(), {"post.html"})
+
+    def test_graph(self):
+        self.build()
+        graph = Manifest(self.manifest).graph()
+        post = os.path.join(self.content, "post.md")
+        index = os.path.join(self.content, "index.md")
+        self.assertEqual(
+            graph["pages"][post]["deps"],
+            [os.path.join(self.templates, "post.html"), os.path.join(self.templates, "foot.html")],
+        )
+        self.assertEqual(graph["pages"][index]["links"], ["/post.html"])
+        self.assertEqual(graph["dependents"]["/post.html"], [index])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+from generator import generate_page_recursive
+from highlight import cache_info, highlight
+from textnode import configure_highlight, configure_memo, markdown_to_html_node
+
+
+class TestHighlight(unittest.TestCase):
+    def test_runs(self):
+        self.assertEqual(
+            highlight('def f(x):  # <1>\n    return "a\\"b" + 0x1F\n', "py"),
+            (
+                ("k", "def"),
+                (None, " f(x):  "),
+                ("c", "# &lt;1&gt;"),
+                (None, "\n    "),
+                ("k", "return"),
+                (None, " "),
+                ("s", '"a\\"b"'),
+                (None, " + "),
+                ("m", "0x1F"),
+                (None, "\n"),
+            ),
+        )
+        self.assertEqual(
+            highlight("echo $# # note", "sh"),
+            ((None, "echo $# "), ("c", "# note")),
+        )
+        self.assertIsNone(highlight("x", "cobol"))
+
+    def test_cached(self):
+        code = "let answer = 42;"
+        first = highlight(code, "js")
+        hits = cache_info().hits
+        self.assertIs(highlight(code, "JavaScript"), first)
+        self.assertEqual(cache_info().hits, hits + 1)
+
+    def test_code_block(self):
+        configure_highlight(highlight)
+        configure_memo()
+        try:
+            node = markdown_to_html_node("```go\nreturn nil // *x*\n```\n\n```text\na < b\n```")
+        finally:
+            configure_highlight(None)
+            configure_memo()
+        self.assertEqual(
+            node.to_html(),
+            '<div><pre><code class="language-go"><span class="k">return</span> '
+            '<span class="k">nil</span> <span class="c">// *x*</span>\n</code></pre>'
+            '<pre><code class="language-text">a &lt; b\n</code></pre></div>',
+        )
+        self.assertEqual("".join(node.iter_text()), "return nil // *x*\na &lt; b\n")
+
+
+class TestHighlightedBuild(unittest.TestCase):
+    def test_toggle_rebuilds(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Code\n\n```python\npass\n```\n")
+            output = os.path.join(tmp, "public", "index.html")
+
+            def build(highlight):
+                errors = generate_page_recursive(
+                    content,
+                    template,
+                    os.path.join(tmp, "public") + "/",
+                    manifest_path=os.path.join(tmp, "manifest.json"),
+                    jobs=2,
+                    highlight=highlight,
+                )
+                self.assertEqual(errors, [])
+                with open(output) as f:
+                    return f.read()
+
+            self.assertIn('<code class="language-python">pass\n</code>', build(False))
+            self.assertIn('<span class="k">pass</span>', build(True))
+            self.assertIn('<code class="language-python">pass\n</code>', build(False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, LeafNode, ParentNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -9,6 +10,30 @@ class TestHTMLNode(unittest.TestCase):
         input = HTMLNode(props={"href": "https://www.google.com", "target": "_blank"})
         self.assertEqual(input.props_to_html(), output)
 
+    def test_parent_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("a", "link", {"href": "/"}),
+            ],
+            {"class": "body"},
+        )
+        self.assertEqual(
+            node.to_html(),
+            '<div class="body"><p><b>Bold</b> text</p><a href="/">link</a></div>',
+        )
+
+    def test_write_to(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, str(i))]) for i in range(3)])
+        out = io.StringIO()
+        node.write_to(out)
+        self.assertEqual(out.getvalue(), "<ul><li>0</li><li>1</li><li>2</li></ul>")
+
+    def test_parent_requires_children(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [ParentNode("p", None)]).to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
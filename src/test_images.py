@@ -0,0 +1,179 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from cache import RenderCache
+from generator import generate_page_recursive
+from images import Image, ImageSizes, probe
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", width, height) + b"\0" * 5
+
+
+def gif(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\0" * 8
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\0" + b"\0" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width) + b"\0" * 10
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+
+def webp(chunk, payload):
+    body = b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class TestProbe(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def probe_bytes(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, "wb") as f:
+            f.write(data)
+        return probe(path)
+
+    def test_formats(self):
+        self.assertEqual(self.probe_bytes(png(640, 480)), (640, 480))
+        self.assertEqual(self.probe_bytes(gif(16, 9)), (16, 9))
+        self.assertEqual(self.probe_bytes(jpeg(1024, 768)), (1024, 768))
+        lossy = b"\0\0\0\x9d\x01\x2a" + struct.pack("<HH", 300, 200)
+        self.assertEqual(self.probe_bytes(webp(b"VP8 ", lossy)), (300, 200))
+        lossless = b"\x2f" + struct.pack("<I", (300 - 1) | ((200 - 1) << 14))
+        self.assertEqual(self.probe_bytes(webp(b"VP8L", lossless)), (300, 200))
+        extended = b"\0" * 4 + (300 - 1).to_bytes(3, "little") + (200 - 1).to_bytes(3, "little")
+        self.assertEqual(self.probe_bytes(webp(b"VP8X", extended)), (300, 200))
+
+    def test_unknown(self):
+        self.assertIsNone(self.probe_bytes(b"not an image"))
+        self.assertIsNone(self.probe_bytes(b"\xff\xd8\xff\xe0"))
+
+    def test_truncated(self):
+        images = {
+            png(640, 480): 24,
+            gif(16, 9): 10,
+            jpeg(1024, 768): 29,
+            webp(b"VP8 ", b"\0\0\0\x9d\x01\x2a" + struct.pack("<HH", 300, 200)): 30,
+            webp(b"VP8L", b"\x2f" + struct.pack("<I", 0)): 25,
+            webp(b"VP8X", b"\0" * 10): 30,
+        }
+        for data, complete in images.items():
+            for n in range(complete):
+                self.assertIsNone(self.probe_bytes(data[:n]), (data[:16], n))
+        self.assertIsNone(self.probe_bytes(b"\xff\xd8\xff\xff"))
+
+
+class TestImageSizes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "public") + "/"
+        self.path = os.path.join(self.tmp.name, "images.json")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(self.content)
+        with open(self.template, "w") as f:
+            f.write("{{ Content }}")
+        self.write_image(png(640, 480))
+        with open(os.path.join(self.content, "index.md"), "w") as f:
+            f.write("# Page\n\n![alt](/images/a.png) ![remote](https://x/b.png)\n")
+        with open(os.path.join(self.content, "other.md"), "w") as f:
+            f.write("# Other\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_image(self, data):
+        path = os.path.join(self.static, "images", "a.png")
+        with open(path, "wb") as f:
+            f.write(data)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    def build(self, image_sizes=True, cache=None):
+        errors = generate_page_recursive(
+            self.content,
+            self.template,
+            self.dest,
+            manifest_path=os.path.join(self.tmp.name, "manifest.json"),
+            cache=cache,
+            image_sizes=ImageSizes(self.static, self.path) if image_sizes else None,
+        )
+        self.assertEqual(errors, [])
+        rebuilt = set()
+        for name in ("index.html", "other.html"):
+            path = os.path.join(self.dest, name)
+            if os.stat(path).st_mtime_ns != 0:
+                rebuilt.add(name)
+            os.utime(path, ns=(0, 0))
+        with open(os.path.join(self.dest, "index.html")) as f:
+            return rebuilt, f.read()
+
+    def test_attributes(self):
+        sizes = ImageSizes(self.static)
+        self.assertEqual(
+            sizes.attrs("/images/a.png"),
+            {"width": "640", "height": "480", "loading": "lazy", "decoding": "async"},
+        )
+        self.assertEqual(sizes.attrs("/missing.png"), {"loading": "lazy", "decoding": "async"})
+
+    def test_sizes_are_cached(self):
+        sizes = ImageSizes(self.static, self.path)
+        sizes.size("/images/a.png")
+        sizes.save()
+        sizes = ImageSizes(self.static, self.path)
+        self.assertEqual(sizes.size("/images/a.png"), (640, 480))
+        self.assertEqual(sizes.probed, {})
+
+    def test_build_and_image_changes(self):
+        rebuilt, html = self.build()
+        self.assertEqual(rebuilt, {"index.html", "other.html"})
+        self.assertIn(
+            '<img src="/images/a.png" alt="alt" width="640" height="480" '
+            'loading="lazy" decoding="async">',
+            html,
+        )
+        self.assertIn('<img src="https://x/b.png" alt="remote" loading="lazy"', html)
+        self.assertEqual(self.build()[0], set())
+
+        # A resized image re-renders only the pages showing it.
+        self.write_image(png(320, 240))
+        rebuilt, html = self.build()
+        self.assertEqual(rebuilt, {"index.html"})
+        self.assertIn('width="320" height="240"', html)
+
+    def test_toggling_image_sizes_rebuilds(self):
+        cache = RenderCache(os.path.join(self.tmp.name, "cache"), 1 << 20)
+        rebuilt, html = self.build(image_sizes=False, cache=cache)
+        self.assertNotIn("width=", html)
+        rebuilt, html = self.build(cache=cache)
+        self.assertEqual(rebuilt, {"index.html", "other.html"})
+        self.assertIn('width="640"', html)
+        rebuilt, html = self.build(image_sizes=False, cache=cache)
+        self.assertEqual(rebuilt, {"index.html", "other.html"})
+        self.assertNotIn("width=", html)
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_srcset_variants(self):
+        Image.new("RGB", (640, 480)).save(os.path.join(self.static, "images", "a.png"))
+        sizes = ImageSizes(self.static, widths=(320, 1280))
+        self.assertEqual(
+            sizes.attrs("/images/a.png")["srcset"],
+            "/images/a-320w.png 320w, /images/a.png 640w",
+        )
+        self.assertEqual(sizes.write_variants(["/images/a.png"], self.dest), 1)
+        self.assertEqual(sizes.write_variants(["/images/a.png"], self.dest), 0)
+        with Image.open(os.path.join(self.dest, "images", "a-320w.png")) as variant:
+            self.assertEqual(variant.size, (320, 240))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,6 +18,13 @@ class TestLeafNode(unittest.TestCase):
         )
         self.assertEqual(input.to_html(), output_a)
 
+    def test_node_eq_and_hash(self):
+        a = LeafNode("a", "Click me!", {"href": "/"})
+        b = LeafNode("a", "Click me!", {"href": "/"})
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertNotEqual(a, LeafNode("a", "Click me!", {"href": "/x"}))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,152 @@
+import os
+import tempfile
+import unittest
+
+from generator import generate_page_recursive, render_listings, update_pages
+from listings import plan_listings, url_for
+from manifest import Manifest
+from metadata import MetadataIndex
+
+
+class TestListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("{{ Content }}")
+        self.manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.write("index.md", "# Home\n")
+        for n in range(5):
+            tags = "[odd]" if n % 2 else "[even]"
+            self.write(
+                f"posts/p{n}.md",
+                f"---\ndate: 2024-01-0{n + 1}\ntags: {tags}\n---\n# Post {n}\n",
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel, markdown):
+        path = os.path.join(self.content, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(markdown)
+
+    def listings(self):
+        index = MetadataIndex()
+        sources = [
+            os.path.join(root, f) for root, _, names in os.walk(self.content) for f in names
+        ]
+        index.update(sources)
+        return render_listings(
+            index, self.content, self.template, self.dest, self.manifest, per_page=2
+        )
+
+    def read(self, rel):
+        with open(os.path.join(self.dest, rel)) as f:
+            return f.read()
+
+    def test_url_for(self):
+        self.assertEqual(url_for("public/index.html", "public"), "/")
+        self.assertEqual(url_for("public/a/index.html", "public"), "/a/")
+        self.assertEqual(url_for("public/a/b.html", "public"), "/a/b.html")
+
+    def test_plan(self):
+        listings = plan_listings(
+            [
+                {"title": "B", "url": "/b", "date": "2", "tags": ["x"], "section": "s", "index": False},
+                {"title": "A", "url": "/a", "date": "1", "tags": [], "section": "", "index": False},
+            ],
+            per_page=1,
+        )
+        self.assertEqual(
+            sorted(listings),
+            [
+                "archive/index.html",
+                "archive/page/2/index.html",
+                "s/index.html",
+                "tags/index.html",
+                "tags/x/index.html",
+            ],
+        )
+        self.assertEqual(listings["archive/index.html"]["next"], "/archive/page/2/")
+        self.assertEqual(listings["archive/page/2/index.html"]["prev"], "/archive/")
+
+    def test_colliding_tag_slugs(self):
+        listings = plan_listings(
+            [
+                {"title": "A", "url": "/a", "date": "", "tags": ["C++", "C"], "section": "", "index": False},
+                {"title": "B", "url": "/b", "date": "", "tags": ["C"], "section": "", "index": False},
+            ]
+        )
+        self.assertEqual(listings["tags/c/index.html"]["title"], "Tagged C")
+        self.assertEqual(len(listings["tags/c/index.html"]["entries"]), 2)
+        self.assertEqual(listings["tags/c-2/index.html"]["title"], "Tagged C++")
+        self.assertEqual(
+            listings["tags/index.html"]["entries"],
+            [["C (2)", "/tags/c/", ""], ["C++ (1)", "/tags/c-2/", ""]],
+        )
+
+    def test_pages_are_paginated_newest_first(self):
+        # archive: 3 pages, posts: 3 pages, even: 2, odd: 1, tags index: 1
+        self.assertEqual(self.listings(), 10)
+        self.assertEqual(
+            self.read("archive/index.html"),
+            '<div><h1>Archive</h1><ul><li><a href="/posts/p4.html">Post 4</a>'
+            "<time>2024-01-05</time></li><li><a href=\"/posts/p3.html\">Post 3</a>"
+            '<time>2024-01-04</time></li></ul><nav><a href="/archive/page/2/" '
+            'rel="next">Older</a></nav></div>',
+        )
+        self.assertIn('href="/tags/odd/"', self.read("tags/index.html"))
+        self.assertIn("Post 1", self.read("tags/odd/index.html"))
+
+    def test_only_changed_listings_are_rewritten(self):
+        self.listings()
+        # An old post only touches the tail of each archive: archive pages 3
+        # and 4 (new), posts page 3, odd pages 1 (gains a next link) and 2
+        # (new), and the tag counts. Newer pages stay as they are.
+        self.write("posts/p5.md", "---\ndate: 2023-12-31\ntags: [odd]\n---\n# Post 5\n")
+        self.assertEqual(self.listings(), 6)
+        self.assertEqual(self.listings(), 0)
+
+    def test_removes_stale_listings(self):
+        self.listings()
+        os.remove(os.path.join(self.content, "posts", "p0.md"))
+        os.remove(os.path.join(self.content, "posts", "p2.md"))
+        os.remove(os.path.join(self.content, "posts", "p4.md"))
+        self.listings()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "tags", "even")))
+
+    def test_build_with_listings_keeps_hand_written_index(self):
+        errors = generate_page_recursive(
+            self.content, self.template, self.dest + "/", listings=True
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual(self.read("index.html"), "<div><h1>Home</h1></div>")
+        self.assertIn("Post 0", self.read("posts/index.html"))
+
+    def test_update_pages_keeps_per_page(self):
+        index = MetadataIndex()
+        index.update(
+            os.path.join(root, f) for root, _, names in os.walk(self.content) for f in names
+        )
+        post = os.path.join(self.content, "posts", "p0.md")
+        self.write("posts/p0.md", "---\ndate: 2024-01-01\ntags: [even]\n---\n# Post 0 again\n")
+        errors = update_pages(
+            [post],
+            self.content,
+            self.template,
+            self.dest,
+            self.manifest,
+            index,
+            listings=True,
+            per_page=2,
+        )
+        self.assertEqual(errors, [])
+        self.assertIn("Post 0 again", self.read("archive/page/3/index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+
+from manifest import MANIFEST_VERSION, Manifest
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "page.md")
+        self.output = os.path.join(self.tmp.name, "page.html")
+        self.path = os.path.join(self.tmp.name, "manifest.json")
+        with open(self.source, "w") as f:
+            f.write("# Title\n")
+        with open(self.output, "w") as f:
+            f.write("<h1>Title</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fresh_after_record(self):
+        manifest = Manifest(self.path)
+        self.assertFalse(manifest.is_fresh(self.source, self.output, "t"))
+        manifest.record(self.source, self.output, "template.html", "t")
+        manifest.save()
+        reloaded = Manifest(self.path)
+        self.assertTrue(reloaded.is_fresh(self.source, self.output, "t"))
+        self.assertFalse(reloaded.is_fresh(self.source, self.output, "other"))
+
+    def test_stale_after_edit(self):
+        manifest = Manifest(self.path)
+        manifest.record(self.source, self.output, "template.html", "t")
+        with open(self.source, "a") as f:
+            f.write("more\n")
+        self.assertFalse(manifest.is_fresh(self.source, self.output, "t"))
+
+    def test_stale_after_image_options_change(self):
+        manifest = Manifest(self.path)
+        manifest.record(self.source, self.output, "template.html", "t")
+        self.assertFalse(
+            manifest.is_fresh(self.source, self.output, "t", image_widths=[])
+        )
+        manifest.record(self.source, self.output, "template.html", "t", image_widths=[320])
+        self.assertTrue(
+            manifest.is_fresh(self.source, self.output, "t", image_widths=[320])
+        )
+        self.assertFalse(
+            manifest.is_fresh(self.source, self.output, "t", image_widths=[640])
+        )
+        self.assertFalse(manifest.is_fresh(self.source, self.output, "t"))
+
+    def test_version_change_keeps_bookkeeping(self):
+        with open(self.path, "w") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION - 1,
+                    "pages": {self.source: {}},
+                    "static": ["a.css"],
+                    "listings": {"tags/index.html": "d"},
+                    "compressed": ["a.css.gz"],
+                },
+                f,
+            )
+        manifest = Manifest(self.path)
+        self.assertEqual(manifest.pages, {})
+        self.assertEqual(manifest.static, {"a.css"})
+        self.assertEqual(manifest.listings, {"tags/index.html": "d"})
+        self.assertEqual(manifest.compressed, {"a.css.gz"})
+
+    def test_remove_missing(self):
+        manifest = Manifest(self.path)
+        manifest.record(self.source, self.output, "template.html", "t")
+        self.assertEqual(manifest.remove_missing(set()), [self.output])
+        self.assertFalse(os.path.exists(self.output))
+        self.assertEqual(manifest.pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
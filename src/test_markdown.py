@@ -1,14 +1,22 @@
+import io
 import unittest
 
 from textnode import (
+    MEMO_SIZE,
     BlockTypes,
     TextNode,
     TextTypes,
     block_to_block_type,
+    block_to_html,
+    configure_memo,
     extract_markdown_images,
     extract_markdown_links,
+    iter_blocks,
     markdown_to_html_node,
+    memo_stats,
+    parse_block,
     split_nodes_delimiter,
+    text_to_textnodes,
 )
 
 
@@ -101,6 +109,68 @@ class TestInlineMarkdown(unittest.TestCase):
             matches,
         )
 
+    def test_text_to_textnodes(self):
+        nodes = text_to_textnodes(
+            "This is **text** with an *italic* word and a `code block` and an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](https://boot.dev)"
+        )
+        self.assertListEqual(
+            [
+                TextNode("This is ", TextTypes.text_type_text),
+                TextNode("text", TextTypes.text_type_bold),
+                TextNode(" with an ", TextTypes.text_type_text),
+                TextNode("italic", TextTypes.text_type_italic),
+                TextNode(" word and a ", TextTypes.text_type_text),
+                TextNode("code block", TextTypes.text_type_code),
+                TextNode(" and an ", TextTypes.text_type_text),
+                TextNode(
+                    "image", TextTypes.text_type_image, "https://i.imgur.com/zjjcJKZ.png"
+                ),
+                TextNode(" and a ", TextTypes.text_type_text),
+                TextNode("link", TextTypes.text_type_link, "https://boot.dev"),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_code_is_literal(self):
+        nodes = text_to_textnodes("use `a*b` here")
+        self.assertListEqual(
+            [
+                TextNode("use ", TextTypes.text_type_text),
+                TextNode("a*b", TextTypes.text_type_code),
+                TextNode(" here", TextTypes.text_type_text),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_linked_image(self):
+        self.assertListEqual(
+            text_to_textnodes("[![build](badge.svg)](https://ci.example)"),
+            [
+                TextNode("[", TextTypes.text_type_text),
+                TextNode("build", TextTypes.text_type_image, "badge.svg"),
+                TextNode("](https://ci.example)", TextTypes.text_type_text),
+            ],
+        )
+        self.assertListEqual(
+            text_to_textnodes("see [ref ![x](a.png) here"),
+            [
+                TextNode("see [ref ", TextTypes.text_type_text),
+                TextNode("x", TextTypes.text_type_image, "a.png"),
+                TextNode(" here", TextTypes.text_type_text),
+            ],
+        )
+
+    def test_text_to_textnodes_unclosed(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("an **unclosed bold")
+
+    def test_nested_emphasis(self):
+        node = markdown_to_html_node("**bold *and italic* text** and *it **b***")
+        self.assertEqual(
+            node.to_html(),
+            "<div><p><b>bold <i>and italic</i> text</b> and <i>it <b>b</b></i></p></div>",
+        )
+
     def test_block_to_block_types(self):
         block = "# heading"
         self.assertEqual(
@@ -127,6 +197,57 @@ class TestInlineMarkdown(unittest.TestCase):
             block_to_block_type(block), BlockTypes.block_type_paragraph.value[0]
         )
 
+    def test_iter_blocks_fenced_code_with_blank_lines(self):
+        lines = io.StringIO("# title\n\n```\nfirst\n\nsecond\n```\ntext after\n\n\n")
+        self.assertListEqual(
+            list(iter_blocks(lines)),
+            ["# title", "```\nfirst\n\nsecond\n```", "text after"],
+        )
+
+    def test_code_block_with_blank_line(self):
+        node = markdown_to_html_node("```\na = 1\n\nb = 2\n```")
+        self.assertEqual(
+            node.to_html(), "<div><pre><code>a = 1\n\nb = 2\n</code></pre></div>"
+        )
+
+    def test_code_block_is_verbatim(self):
+        node = markdown_to_html_node("```python extra\nx = a*b*c  # `<tag>` & **\n```")
+        self.assertEqual(
+            node.to_html(),
+            '<div><pre><code class="language-python">'
+            "x = a*b*c  # `&lt;tag&gt;` &amp; **\n</code></pre></div>",
+        )
+
+    def test_parse_block(self):
+        self.assertEqual(
+            parse_block("### heading"),
+            (BlockTypes.block_type_heading.value[0], (3, "heading")),
+        )
+        self.assertEqual(
+            parse_block("####### too deep"),
+            (BlockTypes.block_type_paragraph.value[0], "####### too deep"),
+        )
+        self.assertEqual(
+            parse_block("- a\n- b"),
+            (BlockTypes.block_type_unordered_list.value[0], ["a", "b"]),
+        )
+        self.assertEqual(
+            parse_block("* a\n- b"),
+            (BlockTypes.block_type_paragraph.value[0], "* a - b"),
+        )
+        items = "\n".join(f"{i}. item {i}" for i in range(1, 12))
+        self.assertEqual(
+            parse_block(items),
+            (
+                BlockTypes.block_type_ordered_list.value[0],
+                [f"item {i}" for i in range(1, 12)],
+            ),
+        )
+        self.assertEqual(
+            parse_block("> a\n>b"),
+            (BlockTypes.block_type_quote.value[0], ["a", "b"]),
+        )
+
     def test_paragraph(self):
         md = """
 This is **bolded** paragraph
@@ -211,5 +332,26 @@ this is paragraph text
         )
 
 
+class TestMemo(unittest.TestCase):
+    def tearDown(self):
+        configure_memo(MEMO_SIZE)
+
+    def test_repeated_blocks_render_once(self):
+        configure_memo(16)
+        footer = "Licensed under **CC-BY**, see [terms](/terms)"
+        first = block_to_html(footer)
+        self.assertEqual(block_to_html(footer), first)
+        self.assertEqual(
+            first, '<p>Licensed under <b>CC-BY</b>, see <a href="/terms">terms</a></p>'
+        )
+        self.assertEqual(memo_stats()["blocks"], {"hits": 1, "misses": 1})
+
+    def test_disabled(self):
+        configure_memo(0)
+        block_to_html("same")
+        block_to_html("same")
+        self.assertEqual(memo_stats()["blocks"], {"hits": 0, "misses": 2})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+
+from generator import extract_title, generate_page_recursive
+from metadata import MetadataIndex, read_metadata, split_front_matter
+
+PAGE = """---
+title: "Front: matter"
+date: 2024-05-01
+tags: [python, web]
+aliases:
+  - /old
+  - /older
+draft: false
+---
+# Heading
+
+Body *text*
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split(self):
+        meta, lines = split_front_matter(PAGE.split("\n"))
+        self.assertEqual(
+            meta,
+            {
+                "title": "Front: matter",
+                "date": "2024-05-01",
+                "tags": ["python", "web"],
+                "aliases": ["/old", "/older"],
+                "draft": False,
+            },
+        )
+        self.assertEqual(next(lines), "# Heading")
+
+    def test_no_front_matter(self):
+        meta, lines = split_front_matter(["# Heading", "", "text"])
+        self.assertEqual(meta, {})
+        self.assertEqual(list(lines), ["# Heading", "", "text"])
+
+    def test_unclosed(self):
+        with self.assertRaises(ValueError):
+            split_front_matter(["---", "title: x", "# Heading"])
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title(PAGE), "Front: matter")
+        self.assertEqual(extract_title("---\ndraft: true\n---\n# Heading\n"), "Heading")
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        os.makedirs(self.content)
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.index_path = os.path.join(self.tmp.name, ".build", "metadata.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, markdown):
+        path = os.path.join(self.content, name)
+        with open(path, "w") as f:
+            f.write(markdown)
+        return path
+
+    def test_reads_header_only(self):
+        # The unclosed emphasis in the body would fail a full parse.
+        path = self.write("a.md", "---\ntags: one\n---\n# A\n\nbroken *body\n")
+        meta = read_metadata(path)
+        self.assertEqual(meta["title"], "A")
+        self.assertEqual(meta["tags"], ["one"])
+        self.assertFalse(meta["draft"])
+
+    def test_update_persists_and_skips_unchanged(self):
+        a = self.write("a.md", PAGE)
+        b = self.write("b.md", "# B\n")
+        index = MetadataIndex(self.index_path)
+        self.assertEqual(index.update([a, b]), {a, b})
+        index.save()
+
+        index = MetadataIndex(self.index_path)
+        self.assertEqual(index.get(a)["tags"], ["python", "web"])
+        self.assertEqual(index.update([a, b]), set())
+        self.write("b.md", "# Renamed B\n")
+        os.remove(a)
+        self.assertEqual(index.update([a, b]), {a, b})
+        self.assertIsNone(index.get(a))
+        self.assertEqual(index.get(b)["title"], "Renamed B")
+
+    def test_build_strips_front_matter_and_skips_drafts(self):
+        self.write("a.md", PAGE)
+        self.write("draft.md", "---\ndraft: true\n---\n# Draft\n")
+        dest = os.path.join(self.tmp.name, "public")
+        errors = generate_page_recursive(
+            self.content, self.template, dest, index_path=self.index_path
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(dest), ["a.html"])
+        with open(os.path.join(dest, "a.html")) as f:
+            self.assertEqual(
+                f.read(),
+                "<title>Front: matter</title><div><h1>Heading</h1>"
+                "<p>Body <i>text</i></p></div>",
+            )
+        self.assertTrue(os.path.exists(self.index_path))
+
+        generate_page_recursive(self.content, self.template, dest, drafts=True)
+        self.assertEqual(sorted(os.listdir(dest)), ["a.html", "draft.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+from generator import generate_page_recursive
+from minify import Minifier, minify, minify_stream
+
+PAGE = """<!DOCTYPE html>
+<html>
+  <head>
+    <!-- metadata -->
+    <meta charset="utf-8" />
+    <link href="/index.css" rel="stylesheet">
+  </head>
+  <body>
+    <p class="lead">Some <em>text</em>
+      continues <!-- note -->here</p>
+    <pre><code class="x">  keep
+    this  </code></pre>
+    <p>inline <code>a  <!-- b --> c</code> done</p>
+    <a href="/a b" title='x'>link</a>
+  </body>
+</html>
+"""
+
+
+class TestMinify(unittest.TestCase):
+    def test_minify(self):
+        self.assertEqual(
+            minify(PAGE),
+            "<!DOCTYPE html><html><head><meta charset=utf-8 />"
+            '<link href="/index.css" rel=stylesheet></head><body>'
+            "<p class=lead>Some <em>text</em> continues here</p>"
+            '<pre><code class="x">  keep\n    this  </code></pre>'
+            "<p>inline <code>a  <!-- b --> c</code> done</p>"
+            '<a href="/a b" title=x>link</a></body></html>',
+        )
+
+    def test_single_spaces_kept(self):
+        html = "<p>a <b>b</b> <i>c</i></p> <p>d</p>"
+        self.assertEqual(minify(html), html)
+
+    def test_comment_between_words(self):
+        self.assertEqual(minify("<p>a<!-- x --> b</p>"), "<p>a b</p>")
+        self.assertEqual(minify("<p>a<!-- x -->b</p>"), "<p>ab</p>")
+
+    def test_chunking_does_not_change_output(self):
+        expected = minify(PAGE)
+        for size in (1, 2, 7, 61):
+            chunks = [PAGE[i : i + size] for i in range(0, len(PAGE), size)]
+            minifier = Minifier()
+            html = "".join(minifier.feed(chunk) for chunk in chunks) + minifier.close()
+            self.assertEqual(html, expected, size)
+            self.assertEqual(minifier.bytes_in, len(PAGE))
+            self.assertEqual(minifier.bytes_out, len(expected))
+
+    def test_split_at_every_offset(self):
+        for html in ("<p>word <b>x</b><!-- note -->\n<b>y</b></p>", PAGE):
+            expected = minify(html)
+            for i in range(len(html) + 1):
+                minifier = Minifier()
+                out = minifier.feed(html[:i]) + minifier.feed(html[i:]) + minifier.close()
+                self.assertEqual(out, expected, i)
+        self.assertEqual(
+            minify("<p>word <b>x</b><!-- note -->\n<b>y</b></p>"),
+            "<p>word <b>x</b> <b>y</b></p>",
+        )
+
+    def test_unclosed_raw_element(self):
+        self.assertEqual("".join(minify_stream(["<pre>a\n\n", "  b"])), "<pre>a\n\n  b")
+
+
+class TestMinifiedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "public") + "/"
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.content)
+        with open(self.template, "w") as f:
+            f.write(
+                "<html>\n  <title>{{ Title }}</title>\n"
+                "  <body>\n    {{ Content }}\n  </body>\n</html>\n"
+            )
+        with open(os.path.join(self.content, "index.md"), "w") as f:
+            f.write("# Page\n\n```\nfn  main()\n    {}\n```\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, minify):
+        errors = generate_page_recursive(
+            self.content,
+            self.template,
+            self.dest,
+            manifest_path=os.path.join(self.tmp.name, "manifest.json"),
+            minify=minify,
+        )
+        self.assertEqual(errors, [])
+        with open(os.path.join(self.dest, "index.html")) as f:
+            return f.read()
+
+    def test_toggle_rebuilds(self):
+        plain = self.build(False)
+        self.assertIn("\n  <body>", plain)
+        html = self.build(True)
+        self.assertEqual(html, minify(plain))
+        self.assertTrue(html.startswith("<html><title>Page</title><body><div>"))
+        self.assertIn("fn  main()\n    {}", html)
+        self.assertEqual(self.build(False), plain)
+
+
+if __name__ == "__main__":
+    unittest.main()
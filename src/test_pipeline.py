@@ -0,0 +1,122 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from cache import RenderCache
+from generator import generate_page_recursive
+from pipeline import run_pipeline
+
+
+class TestRunPipeline(unittest.TestCase):
+    def test_order_and_errors(self):
+        written = {}
+
+        def read(n):
+            if n == 3:
+                raise OSError("unreadable")
+            return n * 10
+
+        def process(n, data):
+            if n == 5:
+                raise ValueError("bad")
+            return None if n == 7 else data + 1
+
+        def write(n, output):
+            if n == 8:
+                raise OSError("disk full")
+            written[n] = output
+
+        failed = run_pipeline(range(10), read, process, write, depth=2)
+        self.assertEqual(written, {0: 1, 1: 11, 2: 21, 4: 41, 6: 61, 9: 91})
+        self.assertEqual(
+            sorted((n, type(e).__name__) for n, e in failed),
+            [(3, "OSError"), (5, "ValueError"), (8, "OSError")],
+        )
+
+    def test_backpressure(self):
+        # Slow writes hold up processing once `depth` outputs are waiting.
+        lock = threading.Lock()
+        waiting = []
+        state = {"outstanding": 0}
+
+        def write(n, output):
+            time.sleep(0.01)
+            with lock:
+                state["outstanding"] -= 1
+
+        def process(n, data):
+            with lock:
+                state["outstanding"] += 1
+                waiting.append(state["outstanding"])
+            return data
+
+        run_pipeline(range(20), lambda n: n, process, write, depth=3, threads=2)
+        self.assertLessEqual(max(waiting), 4)
+
+
+class TestPipelinedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        os.makedirs(os.path.join(self.content, "blog"))
+        for n in range(12):
+            with open(os.path.join(self.content, "blog", f"{n}.md"), "w") as f:
+                f.write(f"# Post {n}\r\n\r\nSome *text* and `code`\r\n\r\n- a\r\n- b\r\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, name, **kwargs):
+        dest = os.path.join(self.tmp.name, name) + "/"
+        errors = generate_page_recursive(self.content, self.template, dest, **kwargs)
+        pages = {}
+        for root, _, f_names in os.walk(dest):
+            for f in f_names:
+                with open(os.path.join(root, f)) as html:
+                    pages[os.path.relpath(os.path.join(root, f), dest)] = html.read()
+        return errors, pages
+
+    def test_same_output_as_serial(self):
+        serial = self.build("serial")
+        self.assertEqual(self.build("pipelined", pipeline=True), serial)
+        self.assertEqual(self.build("parallel", pipeline=True, jobs=2), serial)
+
+    def test_cache_hits(self):
+        cache = RenderCache(os.path.join(self.tmp.name, "cache"))
+        _, first = self.build("first", pipeline=True, cache=cache)
+        errors, second = self.build("second", pipeline=True, cache=cache)
+        self.assertEqual(errors, [])
+        self.assertEqual(second, first)
+        self.assertEqual((cache.hits, cache.misses), (12, 12))
+
+    def test_evicted_entries_are_rendered(self):
+        cache = RenderCache(os.path.join(self.tmp.name, "cache"))
+        _, first = self.build("first", pipeline=True, cache=cache)
+        fetch = cache.fetch
+
+        def evicting_fetch(key, dest_path):
+            os.remove(cache.path_for(key))
+            return fetch(key, dest_path)
+
+        cache.fetch = evicting_fetch
+        errors, second = self.build("second", pipeline=True, cache=cache)
+        self.assertEqual(errors, [])
+        self.assertEqual(second, first)
+        self.assertEqual((cache.hits, cache.misses), (0, 24))
+
+    def test_errors_are_per_page(self):
+        with open(os.path.join(self.content, "blog", "3.md"), "wb") as f:
+            f.write(b"# Broken \xff\n")
+        errors, pages = self.build("public", pipeline=True)
+        self.assertEqual([md for md, _ in errors], [os.path.join(self.content, "blog", "3.md")])
+        self.assertIn("UnicodeDecodeError", errors[0][1])
+        self.assertEqual(len(pages), 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
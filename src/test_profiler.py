@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+
+from generator import generate_page_recursive
+from profiler import STAGES, Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        for name, body in (("a.md", "# A\n\nshort"), ("b/index.md", "# B\n\n" + "word " * 5000)):
+            path = os.path.join(self.content, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(body)
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, dest, **kwargs):
+        errors = generate_page_recursive(
+            self.content, self.template, os.path.join(self.tmp.name, dest), **kwargs
+        )
+        self.assertEqual(errors, [])
+
+    def read_tree(self, dest):
+        out = {}
+        for root, _, f_names in os.walk(os.path.join(self.tmp.name, dest)):
+            for f in f_names:
+                with open(os.path.join(root, f)) as fp:
+                    out[f] = fp.read()
+        return out
+
+    def test_profiled_build_matches_plain_build(self):
+        self.build("plain")
+        self.build("profiled", profiler=Profiler())
+        self.assertEqual(self.read_tree("plain"), self.read_tree("profiled"))
+
+    def test_records_stages_and_pages(self):
+        profiler = Profiler()
+        self.build("public", profiler=profiler)
+        for stage in STAGES:
+            self.assertIn(stage, profiler.stages)
+        slowest = [path for path, _ in profiler.slowest()]
+        self.assertEqual(
+            slowest,
+            [os.path.join(self.content, "b", "index.md"), os.path.join(self.content, "a.md")],
+        )
+        self.assertIn("Slowest 2 of 2 pages", profiler.report())
+
+    def test_merges_worker_profiles(self):
+        profiler = Profiler()
+        self.build("public", jobs=2, profiler=profiler)
+        self.assertEqual(len(profiler.pages), 2)
+        self.assertIn("inline parse", profiler.stages)
+
+    def test_write(self):
+        profiler = Profiler()
+        self.build("public", profiler=profiler)
+        json_path = os.path.join(self.tmp.name, ".build", "profile.json")
+        trace_path = os.path.join(self.tmp.name, ".build", "trace.json")
+        profiler.write(json_path, trace_path)
+        with open(json_path) as f:
+            self.assertEqual(len(json.load(f)["pages"]), 2)
+        with open(trace_path) as f:
+            events = json.load(f)["traceEvents"]
+        self.assertTrue(all(e["ph"] == "X" for e in events))
+        self.assertIn("discovery", {e["name"] for e in events})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+import unittest
+
+from generator import generate_page_recursive
+from search import SearchIndex, terms_for
+from sitemap import write_sitemap
+from textnode import markdown_to_html_node
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "public") + "/"
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.search_path = os.path.join(self.tmp.name, "search.json")
+        with open(self.template, "w") as f:
+            f.write("{{ Content }}")
+        self.write("apple.md", "# Apple\n\nAn **apple** pie with [a link](/x)\n")
+        self.write("banana.md", "---\ndate: 2024-02-01\n---\n# Banana\n\n`bread` *banana*\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel, markdown):
+        os.makedirs(self.content, exist_ok=True)
+        with open(os.path.join(self.content, rel), "w") as f:
+            f.write(markdown)
+
+    def build(self, **kwargs):
+        errors = generate_page_recursive(
+            self.content,
+            self.template,
+            self.dest,
+            search_path=self.search_path,
+            site_url="https://example.com/",
+            **kwargs,
+        )
+        self.assertEqual(errors, [])
+        shards = {}
+        directory = os.path.join(self.dest, "search")
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            with open(path) as f:
+                shards[name] = (os.stat(path).st_mtime_ns, json.load(f))
+            os.utime(path, ns=(0, 0))
+        return shards
+
+    def test_terms_from_nodes(self):
+        node = markdown_to_html_node("# Title\n\nSome **bold** and [link text](/u) a")
+        self.assertEqual(
+            terms_for(node.iter_text()),
+            {"title": 1, "some": 1, "bold": 1, "and": 1, "link": 1, "text": 1},
+        )
+
+    def test_code_terms_are_unescaped(self):
+        node = markdown_to_html_node("```\nif a < b && c > d:\n```")
+        self.assertEqual(terms_for(node.iter_text()), {"if": 1})
+        node = markdown_to_html_node("```\nvec<int> x\n```")
+        self.assertEqual(terms_for(node.iter_text()), {"vec": 1, "int": 1})
+
+    def test_index_shards(self):
+        shards = self.build()
+        docs = shards["docs.json"][1]
+        ids = {title: int(doc_id) for doc_id, (_, title) in docs.items()}
+        self.assertEqual(set(ids), {"Apple", "Banana"})
+        self.assertEqual(shards["a.json"][1]["apple"], [[ids["Apple"], 2]])
+        self.assertEqual(shards["b.json"][1]["banana"], [[ids["Banana"], 2]])
+        self.assertEqual(shards["b.json"][1]["bread"], [[ids["Banana"], 1]])
+
+    def test_parallel_matches_serial(self):
+        serial = self.build()
+        os.remove(self.search_path)
+        parallel = self.build(jobs=2)
+        self.assertEqual(
+            {name: data for name, (_, data) in serial.items()},
+            {name: data for name, (_, data) in parallel.items()},
+        )
+
+    def test_only_changed_shards_are_rewritten(self):
+        self.build(manifest_path=os.path.join(self.tmp.name, "manifest.json"))
+        self.write("banana.md", "# Banana\n\nbanana cherry\n")
+        shards = self.build(manifest_path=os.path.join(self.tmp.name, "manifest.json"))
+        rewritten = {name for name, (mtime, _) in shards.items() if mtime != 0}
+        # "bread" left b.json and "cherry" arrived in c.json.
+        self.assertEqual(rewritten, {"b.json", "c.json"})
+        self.assertNotIn("bread", shards["b.json"][1])
+
+    def test_removed_page_leaves_index(self):
+        self.build()
+        os.remove(os.path.join(self.content, "banana.md"))
+        shards = self.build()
+        self.assertNotIn("c.json", shards)
+        self.assertEqual([title for _, title in shards["docs.json"][1].values()], ["Apple"])
+        self.assertEqual(len(SearchIndex(self.search_path).ids), 1)
+
+
+class TestSitemap(unittest.TestCase):
+    def test_single_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_sitemap(tmp, "https://example.com/", [("/b.html", "2024-01-01"), ("/", None)])
+            with open(os.path.join(tmp, "sitemap.xml")) as f:
+                self.assertEqual(
+                    f.read(),
+                    '<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+                    "<url><loc>https://example.com/</loc></url>\n"
+                    "<url><loc>https://example.com/b.html</loc>"
+                    "<lastmod>2024-01-01</lastmod></url>\n"
+                    "</urlset>\n",
+                )
+            unchanged = [("/", None), ("/b.html", "2024-01-01")]
+            self.assertEqual(write_sitemap(tmp, "https://example.com", unchanged), 0)
+
+    def test_split(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            entries = [(f"/{n}.html", None) for n in range(5)]
+            write_sitemap(tmp, "https://example.com", entries, max_urls=2)
+            self.assertEqual(
+                sorted(os.listdir(tmp)),
+                ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"],
+            )
+            with open(os.path.join(tmp, "sitemap.xml")) as f:
+                self.assertIn("<loc>https://example.com/sitemap-3.xml</loc>", f.read())
+            write_sitemap(tmp, "https://example.com", entries[:2], max_urls=2)
+            self.assertEqual(os.listdir(tmp), ["sitemap.xml"])
+
+
+if __name__ == "__main__":
+    unittest.main()
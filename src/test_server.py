@@ -0,0 +1,217 @@
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from functools import partial
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server import (  # noqa: E402
+    CachingHTTPRequestHandler,
+    FileCache,
+    PageCache,
+    PrecompressedHTTPRequestHandler,
+    RenderingHTTPRequestHandler,
+)
+
+
+class TestFileCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name in "abc":
+                path = os.path.join(tmp, name)
+                with open(path, "wb") as f:
+                    f.write(name.encode() * 10)
+                paths.append(path)
+            cache = FileCache(max_bytes=20)
+            for path in paths:
+                cache.get(path, os.stat(path))
+            self.assertEqual(list(cache.entries), paths[1:])
+            self.assertEqual(cache.size, 20)
+
+
+class QuietHandler(CachingHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietPrecompressedHandler(PrecompressedHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietRenderingHandler(RenderingHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingPageCache(PageCache):
+    renders = 0
+
+    def render(self, path):
+        self.renders += 1
+        return super().render(path)
+
+
+class TestCachingHandler(unittest.TestCase):
+    handler_class = QuietHandler
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "index.html"), "w") as f:
+            f.write("<p>hello</p>")
+        handler = partial(self.handler_class, directory=self.tmp.name, cache=FileCache())
+        self.httpd = ThreadingHTTPServer(("localhost", 0), handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection("localhost", self.httpd.server_address[1])
+
+    def tearDown(self):
+        self.conn.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.tmp.cleanup()
+
+    def get(self, path, headers=None):
+        self.conn.request("GET", path, headers=headers or {})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_keep_alive_and_etag(self):
+        response, body = self.get("/")
+        self.assertEqual((response.status, body), (200, b"<p>hello</p>"))
+        etag = response.getheader("ETag")
+        # Same connection: the server kept it open.
+        response, body = self.get("/index.html", {"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+        response, _ = self.get("/index.html", {"If-Modified-Since": response.getheader("Date")})
+        self.assertEqual(response.status, 304)
+
+
+class TestPrecompressedHandler(TestCachingHandler):
+    handler_class = QuietPrecompressedHandler
+
+    def test_negotiates_encoding(self):
+        with open(os.path.join(self.tmp.name, "index.html.gz"), "wb") as f:
+            f.write(b"gzipped")
+        response, body = self.get("/", {"Accept-Encoding": "br;q=1, gzip;q=0.5"})
+        self.assertEqual((body, response.getheader("Content-Encoding")), (b"gzipped", "gzip"))
+        response, body = self.get("/", {"Accept-Encoding": "gzip;q=0"})
+        self.assertEqual((body, response.getheader("Content-Encoding")), (b"<p>hello</p>", None))
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+
+
+class TestRenderingHandler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nSee [](/blog/post.html)\n")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n")
+        self.pages = CountingPageCache(self.content, self.template)
+        handler = partial(QuietRenderingHandler, directory=self.static, pages=self.pages)
+        self.httpd = ThreadingHTTPServer(("localhost", 0), handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection("localhost", self.httpd.server_address[1])
+
+    def tearDown(self):
+        self.conn.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        exists = os.path.exists(path)
+        with open(path, "w") as f:
+            f.write(text)
+        if exists:
+            # Make sure the mtime moves even on coarse-grained filesystems.
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    def get(self, path, headers=None):
+        self.conn.request("GET", path, headers=headers or {})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_renders_and_caches(self):
+        response, body = self.get("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(
+            body,
+            b'<title>Home</title><div><h1>Home</h1><p>See <a href="/blog/post.html">'
+            b"Post</a></p></div>",
+        )
+        etag = response.getheader("ETag")
+        self.assertEqual(self.get("/index.html")[1], body)
+        self.assertEqual(self.get("/", {"If-None-Match": etag})[0].status, 304)
+        self.assertEqual(self.pages.renders, 1)
+        # Derived from the page alone: a restarted server gives the same
+        # one, and touching an unchanged source keeps it.
+        source = os.path.join(self.content, "index.md")
+        self.write(source, "# Home\n\nSee [](/blog/post.html)\n")
+        fresh = PageCache(self.content, self.template)
+        self.assertEqual(fresh.get(source, os.stat(source))[0], etag)
+
+    def test_plain_serving_skips_renderer(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        loaded = subprocess.run(
+            [sys.executable, "-c", "import server, sys; print('generator' in sys.modules)"],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertEqual(loaded.strip(), "False")
+
+    def test_changes_invalidate(self):
+        self.get("/")
+        # The title of a page it links to.
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Renamed\n")
+        self.assertIn(b">Renamed</a>", self.get("/")[1])
+        self.write(self.template, "<h6>{{ Title }}</h6>{{ Content }}")
+        self.assertTrue(self.get("/")[1].startswith(b"<h6>Home</h6>"))
+        self.write(os.path.join(self.content, "index.md"), "# New\n")
+        self.assertEqual(self.get("/")[1], b"<h6>New</h6><div><h1>New</h1></div>")
+        self.assertEqual(self.pages.renders, 4)
+
+    def test_paths(self):
+        response, _ = self.get("/blog")
+        self.assertEqual((response.status, response.getheader("Location")), (301, "/blog/"))
+        self.assertIn(b"<h1>Blog</h1>", self.get("/blog/")[1])
+        self.assertEqual(self.get("/index.css")[1], b"body {}")
+        self.assertEqual(self.get("/missing.html")[0].status, 404)
+        self.assertEqual(self.get("/../index.md")[0].status, 404)
+
+    def test_traversal(self):
+        os.makedirs(os.path.join(self.tmp.name, "secret"))
+        secret = os.path.join(self.tmp.name, "secret", "pw.md")
+        self.write(secret, "# hunter2\n")
+        self.assertEqual(self.get("../secret/pw.html")[0].status, 404)
+        self.assertEqual(self.get("/../secret/pw.html")[0].status, 404)
+        os.symlink(secret, os.path.join(self.content, "link.md"))
+        self.assertEqual(self.get("/link.html")[0].status, 404)
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Post\n\n[](../../secret/pw.html)\n")
+        response, body = self.get("/blog/post.html")
+        self.assertEqual(response.status, 200)
+        self.assertNotIn(b"hunter2", body)
+        self.assertEqual(self.pages.source_for("../secret/pw.html"), (None, None))
+
+    def test_render_error(self):
+        self.write(os.path.join(self.content, "broken.md"), "no heading\n")
+        self.assertEqual(self.get("/broken.html")[0].status, 500)
+        self.assertEqual(self.get("/")[0].status, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from sync import sync_tree
+
+
+class TestSyncTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        self.write("index.css", "body {}")
+        self.write("images/a.png", "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel, data):
+        path = os.path.join(self.src, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(data)
+        return path
+
+    def test_copies_only_changed_and_removes_stale(self):
+        synced = set()
+        self.assertEqual(sync_tree(self.src, self.dst, synced), (2, 0))
+        self.assertEqual(synced, {"index.css", os.path.join("images", "a.png")})
+        self.assertEqual(sync_tree(self.src, self.dst, synced), (0, 0))
+
+        self.write("index.css", "body { margin: 0 }")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        self.assertEqual(sync_tree(self.src, self.dst, synced), (1, 1))
+        with open(os.path.join(self.dst, "index.css")) as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+
+    def test_leaves_unsynced_files(self):
+        os.makedirs(self.dst)
+        page = os.path.join(self.dst, "index.html")
+        with open(page, "w") as f:
+            f.write("<p>page</p>")
+        sync_tree(self.src, self.dst, set())
+        self.assertTrue(os.path.exists(page))
+
+    def test_hash_compare_and_hardlink(self):
+        synced = set()
+        sync_tree(self.src, self.dst, synced)
+        path = os.path.join(self.src, "index.css")
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(sync_tree(self.src, self.dst, synced, use_hash=True), (0, 0))
+
+        self.write("new.css", "p {}")
+        sync_tree(self.src, self.dst, synced, link=True)
+        self.assertTrue(
+            os.path.samefile(os.path.join(self.src, "new.css"), os.path.join(self.dst, "new.css"))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
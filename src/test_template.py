@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><p>{{Content}}</p>{{ Title }}")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "body"}),
+            "<title>Hi</title><p>body</p>Hi",
+        )
+
+    def test_arbitrary_and_missing_variables(self):
+        template = Template("{{ Author }} wrote {{ Unknown }}")
+        self.assertEqual(
+            template.render({"Author": "Tolkien"}), "Tolkien wrote {{ Unknown }}"
+        )
+
+    def test_load_template_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("a {{ Title }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as f:
+                f.write("b {{ Title }}")
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+            self.assertEqual(load_template(path).render({"Title": "x"}), "b x")
+
+    def test_partials(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "partials"))
+            path = os.path.join(tmp, "template.html")
+            header = os.path.join(tmp, "partials", "header.html")
+            nav = os.path.join(tmp, "partials", "nav.html")
+            with open(path, "w") as f:
+                f.write("{{> partials/header }}{{ Content }}")
+            with open(header, "w") as f:
+                f.write("<h1>{{ Title }}</h1>{{> partials/nav.html }}")
+            with open(nav, "w") as f:
+                f.write("<nav/>")
+            template = load_template(path)
+            self.assertEqual(
+                template.render({"Title": "T", "Content": "c"}), "<h1>T</h1><nav/>c"
+            )
+            self.assertEqual(template.deps, [path, header, nav])
+            with open(nav, "w") as f:
+                f.write("<nav>x</nav>")
+            os.utime(nav, ns=(0, os.stat(nav).st_mtime_ns + 1))
+            changed = load_template(path)
+            self.assertNotEqual(changed.digest, template.digest)
+
+    def test_partial_cycle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{> loop }}")
+            with open(os.path.join(tmp, "loop.html"), "w") as f:
+                f.write("{{> loop }}")
+            with self.assertRaises(ValueError):
+                load_template(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
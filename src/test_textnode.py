@@ -9,6 +9,20 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", "bold")
         self.assertEqual(node, node2)
 
+    def test_not_eq(self):
+        node = TextNode("This is a text node", "bold")
+        node2 = TextNode("This is a text node", "italic")
+        self.assertNotEqual(node, node2)
+        self.assertNotEqual(node, TextNode("This is a text node", "bold", "https://boot.dev"))
+
+    def test_hash(self):
+        nodes = {TextNode("a", "bold"), TextNode("a", "bold"), TextNode("b", "bold")}
+        self.assertEqual(len(nodes), 2)
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            TextNode("a", "bold").extra = 1
+
 
 if __name__ == "__main__":
     unittest.main()
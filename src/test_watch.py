@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from watch import InotifyWatcher, PollingWatcher, ignored, wait_for_changes
+
+
+class TestWatchers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        with open(os.path.join(self.root, "page.md"), "w") as f:
+            f.write("# Page\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_watcher(self, watcher):
+        self.assertEqual(watcher.poll(0.01), set())
+        os.makedirs(os.path.join(self.root, "sub"))
+        new_page = os.path.join(self.root, "sub", "new.md")
+        with open(new_page, "w") as f:
+            f.write("# New\n")
+        with open(os.path.join(self.root, "page.md"), "a") as f:
+            f.write("more\n")
+        changed = wait_for_changes(watcher, 0.05)
+        self.assertIn(new_page, changed)
+        self.assertIn(os.path.join(self.root, "page.md"), changed)
+
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([self.root], interval=0.01))
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.root])
+        except (OSError, AttributeError):
+            self.skipTest("inotify is not available")
+        self.check_watcher(watcher)
+
+    def test_ignored(self):
+        self.assertTrue(ignored("content/.index.md.swp"))
+        self.assertTrue(ignored("content/index.md~"))
+        self.assertFalse(ignored("content/index.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
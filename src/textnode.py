@@ -1,5 +1,7 @@
 import re
 from enum import Enum
+from functools import lru_cache
+from html import escape
 
 from htmlnode import LeafNode, ParentNode
 
@@ -22,16 +24,54 @@ class BlockTypes(Enum):
     block_type_ordered_list = ["olist", ". "]
 
 
+EMPHASIS = {
+    "**": TextTypes.text_type_bold,
+    "*": TextTypes.text_type_italic,
+}
+
+# A link label can't contain "[", so in "[![alt](src)](href)" the outer
+# bracket stays text and the image is still found, as it always was.
+INLINE_TOKEN = re.compile(
+    r"!\[(?P<alt>[^\]]*)\]\((?P<src>[^)]*)\)"
+    r"|\[(?P<label>[^\[\]]*)\]\((?P<href>[^)]*)\)"
+    r"|`(?P<code>[^`]*)`"
+    r"|(?P<tick>`)"
+    r"|(?P<delim>\*\*|\*)"
+)
+
+
+HEADING_MARKER = BlockTypes.block_type_heading.value[1]
+CODE_FENCE = BlockTypes.block_type_code.value[1]
+QUOTE_MARKER = BlockTypes.block_type_quote.value[1]
+UNORDERED_LIST_MARKERS = tuple(BlockTypes.block_type_unordered_list.value[1].split("|"))
+ORDERED_LIST_MARKER = BlockTypes.block_type_ordered_list.value[1]
+MEMO_SIZE = 4096
+
+
 class TextNode:
-    def __init__(self, text, text_type, url=None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type, url=None, children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        self.children = children
+
+    def _key(self):
+        children = None if self.children is None else tuple(self.children)
+        return (self.text, self.text_type, self.url, children)
 
     def __eq__(self, other_text_none):
-        return self.__dict__ == other_text_none.__dict__
+        if not isinstance(other_text_none, TextNode):
+            return NotImplemented
+        return self._key() == other_text_none._key()
+
+    def __hash__(self):
+        return hash(self._key())
 
     def __repr__(self):
+        if self.children is not None:
+            return f"TextNode({self.text}, {self.text_type}, {self.children})"
         return f"TextNode({self.text}, {self.text_type}, {self.url})"
 
 
@@ -40,19 +80,28 @@ def text_node_to_html_node(text_node):
         return LeafNode(None, text_node.text)
 
     if text_node.text_type == TextTypes.text_type_bold:
+        if text_node.children is not None:
+            return ParentNode("b", [text_node_to_html_node(c) for c in text_node.children])
         return LeafNode("b", text_node.text)
 
     if text_node.text_type == TextTypes.text_type_italic:
+        if text_node.children is not None:
+            return ParentNode("i", [text_node_to_html_node(c) for c in text_node.children])
         return LeafNode("i", text_node.text)
 
     if text_node.text_type == TextTypes.text_type_code:
         return LeafNode("code", text_node.text)
 
     if text_node.text_type == TextTypes.text_type_link:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        # [](url) links to another page by its title.
+        text = text_node.text or _link_titles.get(text_node.url, "")
+        return LeafNode("a", text, {"href": text_node.url})
 
     if text_node.text_type == TextTypes.text_type_image:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        props = {"src": text_node.url, "alt": text_node.text}
+        if _image_sizes is not None:
+            props.update(_image_sizes.attrs(text_node.url))
+        return LeafNode("img", "", props)
 
     raise ValueError("Text Node not valid")
 
@@ -138,68 +187,165 @@ def split_nodes_link(old_nodes):
     return new_nodes
 
 
+def _append_text(nodes, text):
+    if text == "":
+        return
+    if (
+        nodes
+        and nodes[-1].text_type == TextTypes.text_type_text
+        and nodes[-1].children is None
+    ):
+        nodes[-1].text += text
+        return
+    nodes.append(TextNode(text, TextTypes.text_type_text))
+
+
+def _close_emphasis(delimiter, children):
+    text_type = EMPHASIS[delimiter]
+    text = "".join(c.text for c in children)
+    if len(children) == 1 and children[0].text_type == TextTypes.text_type_text:
+        return TextNode(text, text_type)
+    return TextNode(text, text_type, children=children)
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextTypes.text_type_text)]
-    nodes = split_nodes_delimiter(nodes, "**", TextTypes.text_type_bold)
-    nodes = split_nodes_delimiter(nodes, "*", TextTypes.text_type_italic)
-    nodes = split_nodes_delimiter(nodes, "`", TextTypes.text_type_code)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
+    # One left-to-right scan. Links, images and code spans are atomic tokens;
+    # emphasis delimiters open and close frames on a stack, so bold and
+    # italic can nest inside each other.
+    root = []
+    stack = []
+    nodes = root
+    pos = 0
+    for match in INLINE_TOKEN.finditer(text):
+        _append_text(nodes, text[pos : match.start()])
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == "src":
+            nodes.append(
+                TextNode(match.group("alt"), TextTypes.text_type_image, match.group("src"))
+            )
+        elif kind == "href":
+            nodes.append(
+                TextNode(match.group("label"), TextTypes.text_type_link, match.group("href"))
+            )
+        elif kind == "code":
+            if match.group("code") != "":
+                nodes.append(TextNode(match.group("code"), TextTypes.text_type_code))
+        elif kind == "tick":
+            raise ValueError("Invalid markdown, code section not closed")
+        else:
+            delimiter = match.group("delim")
+            if not any(open_delim == delimiter for open_delim, _ in stack):
+                stack.append((delimiter, []))
+                nodes = stack[-1][1]
+                continue
+            # Frames opened after the one being closed were never closed
+            # themselves; they fall back to literal text.
+            while stack[-1][0] != delimiter:
+                inner, children = stack.pop()
+                parent = stack[-1][1]
+                _append_text(parent, inner)
+                for child in children:
+                    if child.text_type == TextTypes.text_type_text:
+                        _append_text(parent, child.text)
+                    else:
+                        parent.append(child)
+            _, children = stack.pop()
+            nodes = stack[-1][1] if stack else root
+            if children:
+                nodes.append(_close_emphasis(delimiter, children))
+    _append_text(nodes, text[pos:])
+    if stack:
+        raise ValueError(
+            f"Invalid markdown, {EMPHASIS[stack[-1][0]].value} section not closed"
+        )
+    return root
+
+
+def iter_blocks(lines):
+    # Lazily group lines (a list or an open file) into blank-line separated
+    # blocks. Fenced code is kept whole, blank lines included.
+    block = []
+    fenced = False
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.startswith(CODE_FENCE):
+            if not fenced:
+                if block:
+                    yield "\n".join(block).strip()
+                block = [line]
+                fenced = True
+                continue
+            block.append(line)
+            yield "\n".join(block).strip()
+            block = []
+            fenced = False
+            continue
+        if not fenced and line.strip() == "":
+            if block:
+                yield "\n".join(block).strip()
+                block = []
+            continue
+        block.append(line)
+    if block:
+        yield "\n".join(block).strip()
 
 
 def markdown_to_blocks(markdown):
-    return [b.strip() for b in markdown.split("\n\n") if b != ""]
+    return list(iter_blocks(markdown.split("\n")))
 
 
-def block_to_block_type(block):
+def parse_block(block):
+    # Classify the block and pull out what its renderer needs (heading level,
+    # list items, quote lines) while looking at each line once.
     lines = block.split("\n")
-    if (
-        block.startswith(BlockTypes.block_type_heading.value[1])
-        or block.startswith(BlockTypes.block_type_heading.value[1] * 2)
-        or block.startswith(BlockTypes.block_type_heading.value[1] * 3)
-        or block.startswith(BlockTypes.block_type_heading.value[1] * 4)
-        or block.startswith(BlockTypes.block_type_heading.value[1] * 5)
-        or block.startswith(BlockTypes.block_type_heading.value[1] * 6)
-    ):
-        return BlockTypes.block_type_heading.value[0]
-    if (
-        len(lines) > 1
-        and lines[0].startswith(BlockTypes.block_type_code.value[1])
-        and lines[-1].startswith(BlockTypes.block_type_code.value[1])
-    ):
-        return BlockTypes.block_type_code.value[0]
-    if block.startswith(BlockTypes.block_type_quote.value[1]):
-        for line in lines:
-            if not line.startswith(BlockTypes.block_type_quote.value[1]):
-                return BlockTypes.block_type_paragraph.value[0]
-        return BlockTypes.block_type_quote.value[0]
-    if block.startswith(BlockTypes.block_type_unordered_list.value[1].split("|")[0]):
-        for line in lines:
-            if not line.startswith(
-                BlockTypes.block_type_unordered_list.value[1].split("|")[0]
-            ):
-                return BlockTypes.block_type_paragraph.value[0]
-        return BlockTypes.block_type_unordered_list.value[0]
+    first = lines[0]
+
+    if first.startswith(HEADING_MARKER):
+        level = len(first) - len(first.lstrip(HEADING_MARKER))
+        if level <= 6 and block[level : level + 1] == " ":
+            return BlockTypes.block_type_heading.value[0], (level, block[level + 1 :])
+        return BlockTypes.block_type_paragraph.value[0], " ".join(lines)
 
-    if block.startswith(BlockTypes.block_type_unordered_list.value[1].split("|")[1]):
+    if first.startswith(CODE_FENCE):
+        if len(lines) > 1 and lines[-1].startswith(CODE_FENCE):
+            return BlockTypes.block_type_code.value[0], block
+        return BlockTypes.block_type_paragraph.value[0], " ".join(lines)
+
+    if first.startswith(QUOTE_MARKER):
+        quote = []
         for line in lines:
-            if not line.startswith(
-                BlockTypes.block_type_unordered_list.value[1].split("|")[1]
-            ):
-                return BlockTypes.block_type_paragraph.value[0]
-        return BlockTypes.block_type_unordered_list.value[0]
-    if block.startswith(f"1{BlockTypes.block_type_ordered_list.value[1]}"):
-        idx = 1
+            if not line.startswith(QUOTE_MARKER):
+                return BlockTypes.block_type_paragraph.value[0], " ".join(lines)
+            quote.append(line.lstrip(QUOTE_MARKER).strip())
+        return BlockTypes.block_type_quote.value[0], quote
+
+    marker = first[:2]
+    if marker in UNORDERED_LIST_MARKERS:
+        items = []
         for line in lines:
-            if not line.startswith(f"{idx}. "):
-                return BlockTypes.block_type_paragraph.value[0]
-            idx += 1
-        return BlockTypes.block_type_ordered_list.value[0]
-    return BlockTypes.block_type_paragraph.value[0]
+            if not line.startswith(marker):
+                return BlockTypes.block_type_paragraph.value[0], " ".join(lines)
+            items.append(line[2:])
+        return BlockTypes.block_type_unordered_list.value[0], items
 
+    if first.startswith(f"1{ORDERED_LIST_MARKER}"):
+        items = []
+        for idx, line in enumerate(lines, 1):
+            prefix = f"{idx}{ORDERED_LIST_MARKER}"
+            if not line.startswith(prefix):
+                return BlockTypes.block_type_paragraph.value[0], " ".join(lines)
+            items.append(line[len(prefix) :])
+        return BlockTypes.block_type_ordered_list.value[0], items
 
-def text_to_children(text):
+    return BlockTypes.block_type_paragraph.value[0], " ".join(lines)
+
+
+def block_to_block_type(block):
+    return parse_block(block)[0]
+
+
+def _text_to_children(text):
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
@@ -208,70 +354,75 @@ def text_to_children(text):
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
-    paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+def text_to_children(text):
+    # Copy so callers can't mutate the memoized list.
+    return list(_memo_children(text))
+
+
+def paragraph_to_html_node(text):
+    children = text_to_children(text)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
-    level = 0
-    for char in block:
-        if char == "#":
-            level += 1
-        else:
-            break
-    if level + 1 >= len(block):
-        raise ValueError(f"Invalid heading level: {level}")
-    text = block[level + 1 :]
+def heading_to_html_node(heading):
+    level, text = heading
     children = text_to_children(text)
     return ParentNode(f"h{level}", children)
 
 
 def code_to_html_node(block):
-    if not block.startswith("```") or not block.endswith("```"):
+    # The code is escaped but otherwise verbatim; the first word of the
+    # fence's info string becomes a language-* class.
+    if not block.endswith(CODE_FENCE):
         raise ValueError("Invalid code block")
-    text = block[4:-3]
-    children = text_to_children(text)
-    code = ParentNode("code", children)
-    return ParentNode("pre", [code])
-
-
-def olist_to_html_node(block):
-    items = block.split("\n")
+    fence, _, rest = block.partition("\n")
+    info = fence[len(CODE_FENCE) :].split()
+    code = rest[: -len(CODE_FENCE)]
+    props = {"class": f"language-{escape(info[0])}"} if info else None
+    runs = _highlighter(code, info[0]) if info and _highlighter is not None else None
+    if runs is None:
+        return ParentNode("pre", [LeafNode("code", escape(code, quote=False), props)])
+    children = [
+        LeafNode(None, text) if cls is None else LeafNode("span", text, {"class": cls})
+        for cls, text in runs
+    ]
+    return ParentNode("pre", [ParentNode("code", children, props)])
+
+
+def olist_to_html_node(items):
     html_items = []
     for item in items:
-        text = item[3:]
-        children = text_to_children(text)
+        children = text_to_children(item)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(items):
     html_items = []
     for item in items:
-        text = item[2:]
-        children = text_to_children(text)
+        children = text_to_children(item)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
-    new_lines = []
-    for line in lines:
-        if not line.startswith(">"):
-            raise ValueError("Invalid quote block")
-        new_lines.append(line.lstrip(">").strip())
-    content = " ".join(new_lines)
+def quote_to_html_node(lines):
+    content = " ".join(lines)
     children = text_to_children(content)
     return ParentNode("blockquote", children)
 
 
+BLOCK_RENDERERS = {
+    BlockTypes.block_type_paragraph.value[0]: paragraph_to_html_node,
+    BlockTypes.block_type_heading.value[0]: heading_to_html_node,
+    BlockTypes.block_type_code.value[0]: code_to_html_node,
+    BlockTypes.block_type_ordered_list.value[0]: olist_to_html_node,
+    BlockTypes.block_type_unordered_list.value[0]: ulist_to_html_node,
+    BlockTypes.block_type_quote.value[0]: quote_to_html_node,
+}
+
+
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+    blocks = iter_blocks(markdown.split("\n"))
     children = []
     for block in blocks:
         html_node = block_to_html_node(block)
@@ -279,18 +430,105 @@ def markdown_to_html_node(markdown):
     return ParentNode("div", children, None)
 
 
+def iter_blocks_html(blocks, text=None):
+    # Same output as markdown_to_html_node(...).iter_html(), but only one
+    # block's node tree is alive at a time. Given a text list, each block's
+    # text content is appended to it; those blocks bypass the block memo
+    # since their trees are needed.
+    yield "<div>"
+    for block in blocks:
+        if text is None:
+            yield block_to_html(block)
+            continue
+        node = block_to_html_node(block)
+        text.extend(node.iter_text())
+        yield from node.iter_html()
+    yield "</div>"
+
+
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == BlockTypes.block_type_paragraph.value[0]:
-        return paragraph_to_html_node(block)
-    if block_type == BlockTypes.block_type_heading.value[0]:
-        return heading_to_html_node(block)
-    if block_type == BlockTypes.block_type_code.value[0]:
-        return code_to_html_node(block)
-    if block_type == BlockTypes.block_type_ordered_list.value[0]:
-        return olist_to_html_node(block)
-    if block_type == BlockTypes.block_type_unordered_list.value[0]:
-        return ulist_to_html_node(block)
-    if block_type == BlockTypes.block_type_quote.value[0]:
-        return quote_to_html_node(block)
-    raise ValueError("Invalid block type")
+    block_type, parsed = parse_block(block)
+    return BLOCK_RENDERERS[block_type](parsed)
+
+
+def _block_to_html(block):
+    return "".join(block_to_html_node(block).iter_html())
+
+
+def block_to_html(block):
+    return _memo_block_html(block)
+
+
+def configure_memo(maxsize=MEMO_SIZE):
+    # Start a fresh pair of memos: block -> HTML and inline text -> children.
+    # Repeated blocks (footers, disclaimers, shared snippets) are rendered
+    # once per build. maxsize=0 disables memoization but keeps counting.
+    global _memo_block_html, _memo_children
+    _memo_block_html = lru_cache(maxsize=maxsize)(_block_to_html)
+    _memo_children = lru_cache(maxsize=maxsize)(_text_to_children)
+    _merged_stats.clear()
+
+
+def memo_size():
+    return _memo_block_html.cache_info().maxsize
+
+
+def memo_stats():
+    stats = {}
+    for name, memo in (("blocks", _memo_block_html), ("inline", _memo_children)):
+        info = memo.cache_info()
+        merged = _merged_stats.get(name, {})
+        stats[name] = {
+            "hits": info.hits + merged.get("hits", 0),
+            "misses": info.misses + merged.get("misses", 0),
+        }
+    return stats
+
+
+def merge_memo_stats(stats):
+    # Fold in counts reported by worker processes.
+    for name, counts in stats.items():
+        merged = _merged_stats.setdefault(name, {"hits": 0, "misses": 0})
+        merged["hits"] += counts["hits"]
+        merged["misses"] += counts["misses"]
+
+
+def configure_links(titles):
+    # URL -> page title, for links written with empty text. Memoized output
+    # depends on these, so call configure_memo() afterwards.
+    global _link_titles
+    _link_titles = titles
+
+
+def link_titles():
+    return _link_titles
+
+
+def configure_images(image_sizes):
+    # Object whose attrs(src) gives extra <img> attributes (images.ImageSizes),
+    # or None. Like configure_links(), call configure_memo() afterwards.
+    global _image_sizes
+    _image_sizes = image_sizes
+
+
+def image_sizes():
+    return _image_sizes
+
+
+def configure_highlight(highlighter):
+    # Function (code, language) -> (class, escaped text) runs or None, like
+    # highlight.highlight, or None for plain code blocks. Like
+    # configure_links(), call configure_memo() afterwards.
+    global _highlighter
+    _highlighter = highlighter
+
+
+def highlighter():
+    return _highlighter
+
+
+_link_titles = {}
+_image_sizes = None
+_highlighter = None
+_merged_stats = {}
+configure_memo()
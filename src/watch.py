@@ -0,0 +1,329 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer
+
+from generator import generate_page_recursive, update_pages
+from listings import PER_PAGE
+from manifest import Manifest
+from metadata import MetadataIndex
+from sync import copy_file, remove_file
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import server  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+EVENT = struct.Struct("iIII")
+
+
+def ignored(path):
+    # Editor swap and backup files never become pages.
+    name = os.path.basename(path)
+    return name.startswith(".") or name.endswith("~")
+
+
+class PollingWatcher:
+    def __init__(self, roots, interval=0.2):
+        self.roots = roots
+        self.interval = interval
+        self.state = self.scan()
+
+    def scan(self):
+        state = {}
+        for root in self.roots:
+            for dir_path, _, f_names in os.walk(root):
+                for f in f_names:
+                    path = os.path.join(dir_path, f)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    state[path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def poll(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state = self.scan()
+            changed = {
+                p for p in self.state.keys() | state.keys() if self.state.get(p) != state.get(p)
+            }
+            self.state = state
+            if changed:
+                return changed
+            if deadline is None:
+                time.sleep(self.interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+
+class InotifyWatcher:
+    def __init__(self, roots):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        for root in roots:
+            self.add_tree(root)
+
+    def add_tree(self, root):
+        found = set()
+        for dir_path, _, f_names in os.walk(root):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = dir_path
+            found.update(os.path.join(dir_path, f) for f in f_names)
+        return found
+
+    def read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if wd not in self.dirs or not name:
+                    continue
+                path = os.path.join(self.dirs[wd], name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may land before the new directory is watched.
+                        changed |= self.add_tree(path)
+                    changed.add(path)
+                    continue
+                changed.add(path)
+
+    def poll(self, timeout=None):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        return self.read_events()
+
+
+def make_watcher(roots):
+    try:
+        return InotifyWatcher(roots)
+    except (OSError, AttributeError):
+        return PollingWatcher(roots)
+
+
+def wait_for_changes(watcher, debounce):
+    # Block for the first change, then keep collecting until the burst of
+    # saves has been quiet for `debounce` seconds.
+    changed = watcher.poll()
+    while True:
+        more = watcher.poll(debounce)
+        if not more:
+            return {p for p in changed if not ignored(p)}
+        changed |= more
+
+
+def under(path, root):
+    root = os.path.normpath(root)
+    return os.path.normpath(path).startswith(root + os.sep)
+
+
+class Rebuilder:
+    def __init__(
+        self,
+        content,
+        static,
+        templates,
+        template_path,
+        dest,
+        manifest_path,
+        index_path=None,
+        drafts=False,
+        listings=False,
+        per_page=PER_PAGE,
+        search_path=None,
+        site_url=None,
+        image_sizes=None,
+        minify=False,
+        highlight=False,
+    ):
+        self.content = content
+        self.static = static
+        self.templates = templates
+        self.template_path = template_path
+        self.dest = dest
+        self.manifest_path = manifest_path
+        self.manifest = None
+        self.index_path = index_path
+        self.drafts = drafts
+        self.listings = listings
+        self.per_page = per_page
+        self.search_path = search_path
+        self.site_url = site_url
+        self.image_sizes = image_sizes
+        self.minify = minify
+        self.highlight = highlight
+
+    def full(self):
+        if self.manifest is not None:
+            # generate_page_recursive reloads the manifest and index from disk.
+            self.manifest.save()
+            self.index.save()
+        errors = generate_page_recursive(
+            self.content,
+            self.template_path,
+            self.dest,
+            manifest_path=self.manifest_path,
+            index_path=self.index_path,
+            drafts=self.drafts,
+            listings=self.listings,
+            per_page=self.per_page,
+            search_path=self.search_path,
+            site_url=self.site_url,
+            image_sizes=self.image_sizes,
+            minify=self.minify,
+            highlight=self.highlight,
+        )
+        self.manifest = Manifest(self.manifest_path)
+        self.index = MetadataIndex(self.index_path)
+        return errors
+
+    def sync_static(self, paths):
+        for path in paths:
+            rel = os.path.relpath(path, self.static)
+            target = os.path.join(self.dest, rel)
+            if os.path.isfile(path):
+                copy_file(path, target)
+                self.manifest.static.add(rel)
+            elif rel in self.manifest.static:
+                remove_file(target, self.dest)
+                self.manifest.static.discard(rel)
+
+    def rebuild(self, changed):
+        self.sync_static([p for p in changed if under(p, self.static)])
+        content = [p for p in changed if under(p, self.content)]
+        if any(under(p, self.templates) for p in changed) or any(
+            os.path.isdir(p) or (not os.path.exists(p) and p not in self.manifest.pages)
+            for p in content
+        ):
+            # Templates and whole directories can touch any page; let the
+            # manifest work out which ones.
+            return self.full()
+        return update_pages(
+            content,
+            self.content,
+            self.template_path,
+            self.dest,
+            self.manifest,
+            self.index,
+            self.drafts,
+            self.listings,
+            self.per_page,
+            self.search_path,
+            self.site_url,
+            self.image_sizes,
+            self.minify,
+            self.highlight,
+        )
+
+
+def watch(
+    content,
+    static,
+    templates,
+    template_path,
+    dest,
+    manifest_path,
+    port=8888,
+    debounce=0.03,
+    index_path=None,
+    drafts=False,
+    listings=False,
+    per_page=PER_PAGE,
+    search_path=None,
+    site_url=None,
+    image_sizes=None,
+    minify=False,
+    highlight=False,
+):
+    rebuilder = Rebuilder(
+        content,
+        static,
+        templates,
+        template_path,
+        dest,
+        manifest_path,
+        index_path,
+        drafts,
+        listings,
+        per_page,
+        search_path,
+        site_url,
+        image_sizes,
+        minify,
+        highlight,
+    )
+    for md, error in rebuilder.full():
+        logger.error("Failed to generate %s: %s", md, error)
+
+    livereload = server.LiveReload()
+    handler = type(
+        "LiveReloadHandler", (server.CORSHTTPRequestHandler,), {"livereload": livereload}
+    )
+    httpd = ThreadingHTTPServer(("", port), partial(handler, directory=dest))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    logger.info(
+        "Watching %s, %s and %s; serving http://localhost:%d", content, static, templates, port
+    )
+
+    watcher = make_watcher([content, static, templates])
+    try:
+        while True:
+            changed = wait_for_changes(watcher, debounce)
+            if not changed:
+                continue
+            start = time.perf_counter()
+            for md, error in rebuilder.rebuild(changed):
+                logger.error("Failed to generate %s: %s", md, error)
+            livereload.notify()
+            logger.info(
+                "Rebuilt %d changed file(s) in %.1f ms",
+                len(changed),
+                (time.perf_counter() - start) * 1000,
+            )
+            rebuilder.manifest.save()
+            rebuilder.index.save()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()